@@ -1,26 +1,64 @@
 """rio_viz app."""
 
+import asyncio
+import importlib
+import json
+import os
+import threading
+import time
 import urllib.parse
-from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union
+import warnings
+from dataclasses import dataclass
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 import attr
 import jinja2
+import numpy
 import rasterio
 import uvicorn
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, Path, Query
 from geojson_pydantic.features import Feature
-from geojson_pydantic.geometries import MultiPolygon, Polygon
+from geojson_pydantic.geometries import MultiPoint, MultiPolygon, Polygon
+from pydantic import BaseModel
 from rio_tiler.constants import WGS84_CRS
 from rio_tiler.io import BaseReader, MultiBandReader, MultiBaseReader, Reader
-from rio_tiler.models import BandStatistics, Info
+from rio_tiler.models import BandStatistics, ImageData, Info
 from server_thread import ServerManager, ServerThread
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, Response
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
 from starlette.templating import Jinja2Templates
 from starlette_cramjam.middleware import CompressionMiddleware
 from typing_extensions import Annotated
 
+from rio_viz.cache import LRUCache, SingleFlight, get_dataset_version
+from rio_viz.executor import BoundedExecutor, ExecutorError
+from rio_viz.io import MosaicReader
+from rio_viz.io.methods import PixelSelectionMethod
+from rio_viz.io.points import aggregate_windows, read_points, read_points_each
+from rio_viz.metrics import Metrics, timer
+from rio_viz.middleware import (
+    CacheControlMiddleware,
+    ETagMiddleware,
+    FilesOpenedMiddleware,
+    MetricsMiddleware,
+)
+from rio_viz.pool import ReaderPool
 from rio_viz.resources.enums import RasterFormat, VectorTileFormat
 
 from titiler.core.algorithm import algorithms as available_algorithms
@@ -45,7 +83,6 @@ from titiler.core.dependencies import (
     TileParams,
 )
 from titiler.core.errors import DEFAULT_STATUS_CODES, add_exception_handlers
-from titiler.core.middleware import CacheControlMiddleware
 from titiler.core.models.mapbox import TileJSON
 from titiler.core.models.responses import (
     InfoGeoJSON,
@@ -70,6 +107,54 @@ templates = Jinja2Templates(env=jinja2_env)
 
 TileFormat = Union[RasterFormat, VectorTileFormat]
 
+# Per worker thread state
+_worker = threading.local()
+
+# Environment variable used to pass `viz` settings to the server processes
+SETTINGS_ENV = "RIO_VIZ_SETTINGS"
+
+
+@dataclass
+class PixelSelectionParams(DefaultDependency):
+    """Mosaic pixel selection method."""
+
+    pixel_selection: Annotated[
+        Optional[PixelSelectionMethod],
+        Query(
+            description="Pixel selection method (default to `first`). `median` is approximate where more than 64 datasets overlap."
+        ),
+    ] = None
+
+    def as_dict(self, exclude_none: bool = True) -> Dict:
+        """Transform dataclass to dict."""
+        if self.pixel_selection is None:
+            return {}
+
+        return {"pixel_selection": self.pixel_selection.value}
+
+
+class Points(BaseModel):
+    """List of coordinates."""
+
+    coordinates: List[Tuple[float, float]]
+
+
+# Formats of the `transparent` empty tiles (others get `204` responses)
+TRANSPARENT_FORMATS = (RasterFormat.png, RasterFormat.webp)
+
+# Routes returning an ETag (and `304 Not Modified` responses)
+ETAG_ROUTES = [
+    "info",
+    "statistics",
+    "point",
+    "timeseries",
+    "preview",
+    "bbox",
+    "tiles",
+    "tilejson",
+    "WMTSCapabilities",
+]
+
 
 @attr.s
 class viz:
@@ -95,18 +180,101 @@ class viz:
 
     geojson: Optional[Dict] = attr.ib(default=None)
 
+    # Reader instances kept opened between requests (defaults to the number of threads)
+    reader_pool_size: Optional[int] = attr.ib(default=None)
+    reader_pool_idle: float = attr.ib(default=300.0)
+
+    # Size (in bytes) of the rendered tiles cache (0 to disable)
+    tile_cache_size: int = attr.ib(default=0)
+
+    # Minimum number of seconds between checks of the dataset files modification
+    # time and size. Non-local files (e.g URLs) are not checked, so the caches of
+    # remote datasets are never invalidated.
+    dataset_check_interval: float = attr.ib(default=1.0)
+
+    # Compute the viewer's statistics in background when the server starts
+    precompute_statistics: bool = attr.ib(default=False)
+
+    # Threads used to read and render the data
+    threads: Optional[int] = attr.ib(default=None)
+    max_queue: int = attr.ib(default=100)
+    max_wait: Optional[float] = attr.ib(default=30.0)
+    retry_after: int = attr.ib(default=1)
+
+    # Cache-Control header by route name (e.g `tiles`), `default` for other routes
+    cache_control: Dict[str, str] = attr.ib(factory=dict)
+
+    # Response for the tiles outside the dataset: `404`, `204` (No Content) or
+    # `transparent` (an empty PNG or WebP image, `204` for the other formats)
+    empty_tiles: str = attr.ib(
+        default="404", validator=attr.validators.in_(["404", "204", "transparent"])
+    )
+
     # cog / bands / assets
     reader_type: str = attr.ib(init=False)
 
+    pool: ReaderPool = attr.ib(init=False)
+    tile_cache: LRUCache = attr.ib(init=False)
+    metadata_cache: LRUCache = attr.ib(init=False, factory=lambda: LRUCache(maxsize=256))
+    in_flight: SingleFlight = attr.ib(init=False, factory=SingleFlight)
+    executor: BoundedExecutor = attr.ib(init=False)
+    metrics: Metrics = attr.ib(init=False, factory=Metrics)
+
+    _version: Optional[Tuple] = attr.ib(init=False, default=None)
+    _version_checked: float = attr.ib(init=False, default=0.0)
+    _version_lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+    _background_tasks: Set = attr.ib(init=False, factory=set)
+    _empty_tile_cache: Dict = attr.ib(init=False, factory=dict)
+
     router: Optional[APIRouter] = attr.ib(init=False)
 
     statistics_dependency: Type[DefaultDependency] = attr.ib(init=False)
     layer_dependency: Type[DefaultDependency] = attr.ib(init=False)
+    mosaic_dependency: Type[DefaultDependency] = attr.ib(init=False)
 
     def __attrs_post_init__(self):
         """Update App."""
         self.router = APIRouter()
 
+        self.executor = BoundedExecutor(
+            max_workers=self.threads,
+            max_queue=self.max_queue,
+            max_wait=self.max_wait,
+            initializer=self._init_worker,
+        )
+        self.app.router.on_shutdown.append(self.executor.shutdown)
+
+        self.pool = ReaderPool(
+            self.reader,
+            self.src_path,
+            options=self.reader_params,
+            max_size=self.reader_pool_size
+            if self.reader_pool_size is not None
+            else self.executor.max_workers,
+            max_idle=self.reader_pool_idle,
+        )
+        self.app.router.on_shutdown.append(self.pool.close)
+        self.tile_cache = LRUCache(maxsize=self.tile_cache_size)
+
+        self.metrics.register(
+            "rio_viz_tile_cache", "Rendered tiles cache", self.tile_cache.stats
+        )
+        self.metrics.register(
+            "rio_viz_metadata_cache", "Metadata cache", self.metadata_cache.stats
+        )
+        self.metrics.register("rio_viz_executor", "Executor", self.executor.stats)
+        self.metrics.register(
+            "rio_viz_reader_pool", "Reader pool", lambda: {"size": len(self.pool)}
+        )
+        self.metrics.register(
+            "rio_viz_single_flight",
+            "Coalesced requests",
+            lambda: {"in_flight": len(self.in_flight)},
+        )
+
+        if self.precompute_statistics:
+            self.app.router.on_startup.append(self._start_precompute_statistics)
+
         if issubclass(self.reader, (MultiBandReader)):
             self.reader_type = "bands"
         elif issubclass(self.reader, (MultiBaseReader)):
@@ -130,10 +298,31 @@ class viz:
             self.statistics_dependency = AssetsBidxParams
             self.layer_dependency = AssetsBidxExprParamsOptional
 
+        # Pixel selection method for mosaic readers
+        if issubclass(self.reader, MosaicReader):
+            self.mosaic_dependency = PixelSelectionParams
+        else:
+            self.mosaic_dependency = DefaultDependency
+
         self.register_middleware()
         self.register_routes()
         self.app.include_router(self.router)
         add_exception_handlers(self.app, DEFAULT_STATUS_CODES)
+        self.app.add_exception_handler(ExecutorError, self._executor_error_handler)
+
+    def _init_worker(self):
+        """Set up the GDAL environment of a worker thread, for the thread lifetime."""
+        # rasterio's environment (and GDAL config options) are thread local
+        _worker.env = rasterio.Env(**self.config)
+        _worker.env.__enter__()
+
+    def _executor_error_handler(self, request: Request, exc: ExecutorError):
+        """Return 503 with a `Retry-After` header when the server is saturated."""
+        return JSONResponse(
+            content={"detail": str(exc)},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)},
+        )
 
     def register_middleware(self):
         """Register Middleware to the FastAPI app."""
@@ -148,6 +337,19 @@ class viz:
                 "image/webp",
             },
         )
+        self.app.add_middleware(
+            ETagMiddleware,
+            version=self._check_version_async,
+            routes=ETAG_ROUTES,
+            salt=json.dumps(self.settings(), sort_keys=True, default=repr),
+            query_key=self._query_key,
+        )
+        cache_control = {**self.cache_control}
+        self.app.add_middleware(
+            CacheControlMiddleware,
+            cachecontrol=cache_control.pop("default", "no-cache"),
+            rules=cache_control,
+        )
         self.app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -155,10 +357,17 @@ class viz:
             allow_methods=["GET"],
             allow_headers=["*"],
         )
-        self.app.add_middleware(CacheControlMiddleware, cachecontrol="no-cache")
+        self.app.add_middleware(FilesOpenedMiddleware)
+        self.app.add_middleware(MetricsMiddleware, metrics=self.metrics)
 
     def _update_params(self, src_dst, options: Type[DefaultDependency]):
-        """Create Reader options."""
+        """Create Reader options.
+
+        Only the files needed by the request are read: expressions are left to
+        the reader (which only reads the bands/assets they reference) and assets
+        selected with `asset_bidx` are used as default assets.
+
+        """
         if not getattr(options, "expression", None):
             if self.reader_type == "bands":
                 # get default bands from self.layers or reader.bands
@@ -168,12 +377,226 @@ class viz:
                     options.bands = bands
 
             if self.reader_type == "assets":
-                # get default assets from self.layers or reader.assets
-                assets = self.layers or getattr(src_dst, "assets", None)
+                # get default assets from asset_bidx, self.layers or reader.assets
+                assets = (
+                    list(getattr(options, "asset_indexes", None) or {})
+                    or self.layers
+                    or getattr(src_dst, "assets", None)
+                )
                 # check if assets is not in options and overwrite
                 if assets and not getattr(options, "assets", None):
                     options.assets = assets
 
+    def _check_version(self) -> Tuple:
+        """Return the dataset version and clear the caches when it changed.
+
+        The version is the modification time and size of the local dataset files,
+        checked at most every `dataset_check_interval` seconds. It's empty for
+        non-local files (e.g URLs), which never invalidate the caches.
+
+        """
+        with self._version_lock:
+            now = time.monotonic()
+            if (
+                self._version is None
+                or now - self._version_checked >= self.dataset_check_interval
+            ):
+                version = get_dataset_version(self.src_path)
+                if self._version is not None and version != self._version:
+                    self.pool.clear()
+                    self.metadata_cache.clear()
+                    self.tile_cache.clear()
+
+                self._version = version
+                self._version_checked = now
+
+            return self._version
+
+    async def _check_version_async(self) -> Tuple:
+        """Return the dataset version, checking the files in a thread when due."""
+        if (
+            self._version is not None
+            and time.monotonic() - self._version_checked < self.dataset_check_interval
+        ):
+            return self._version
+
+        # stat the (maybe many) files and close the pooled readers off the event loop
+        return await run_in_threadpool(self._check_version)
+
+    def _memoize(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return `func()` result from the metadata cache."""
+        self._check_version()
+        value = self.metadata_cache.get(key)
+        if value is None:
+            value = func()
+            self.metadata_cache.set(key, value, 1)
+
+        return value
+
+    def _get_metadata(self) -> Dict:
+        """Return dataset's bounds, zooms and WMTS TileMatrix (memoized)."""
+
+        def _metadata():
+            with self.pool.get() as src_dst:
+                bounds = (
+                    self.bounds
+                    if self.bounds is not None
+                    else src_dst.get_geographic_bounds(
+                        src_dst.tms.rasterio_geographic_crs
+                    )
+                )
+                minzoom = self.minzoom if self.minzoom is not None else src_dst.minzoom
+                maxzoom = self.maxzoom if self.maxzoom is not None else src_dst.maxzoom
+
+            tile_matrix = []
+            for zoom in range(minzoom, maxzoom + 1):  # type: ignore
+                tm = f"""<TileMatrix>
+                    <ows:Identifier>{zoom}</ows:Identifier>
+                    <ScaleDenominator>{559082264.02872 / 2 ** zoom / 1}</ScaleDenominator>
+                    <TopLeftCorner>-20037508.34278925 20037508.34278925</TopLeftCorner>
+                    <TileWidth>256</TileWidth>
+                    <TileHeight>256</TileHeight>
+                    <MatrixWidth>{2 ** zoom}</MatrixWidth>
+                    <MatrixHeight>{2 ** zoom}</MatrixHeight>
+                </TileMatrix>"""
+                tile_matrix.append(tm)
+
+            return {
+                "bounds": bounds,
+                "minzoom": minzoom,
+                "maxzoom": maxzoom,
+                "tile_matrix": tile_matrix,
+            }
+
+        return self._memoize("metadata", _metadata)
+
+    def _get_statistics(
+        self,
+        key: Tuple,
+        layer_params: DefaultDependency,
+        image_params: PreviewParams,
+        dataset_params: DatasetParams,
+        stats_params: StatisticsParams,
+        histogram_params: HistogramParams,
+    ) -> Dict:
+        """Return dataset statistics (memoized by query parameters).
+
+        The statistics of a subset of bands/assets (e.g requested by the viewers)
+        are taken from the cached statistics of all the bands/assets when available.
+
+        """
+        layers = [value for name, value in key if name in ("bands", "assets")]
+        if layers:
+            self._check_version()
+            base = tuple(kv for kv in key if kv[0] not in ("bands", "assets"))
+            stats = self.metadata_cache.get(("statistics", base))
+            if stats is not None and set(layers) <= set(stats):
+                return {layer: stats[layer] for layer in layers}
+
+        def _statistics():
+            with self.pool.get() as src_dst:
+                if self.nodata is not None and dataset_params.nodata is None:
+                    dataset_params.nodata = self.nodata
+
+                # Adapt options for each reader type
+                self._update_params(src_dst, layer_params)
+
+                with timer("read"):
+                    return src_dst.statistics(
+                        **layer_params.as_dict(),
+                        **dataset_params.as_dict(),
+                        **image_params.as_dict(),
+                        **stats_params.as_dict(),
+                        hist_options=histogram_params.as_dict(),
+                    )
+
+        return self._memoize(("statistics", key), _statistics)
+
+    def _precompute_statistics(self):
+        """Compute the statistics requested by the viewers (`?max_size=256`)."""
+        try:
+            self._get_statistics(
+                (("max_size", "256"),),
+                self.statistics_dependency(),
+                PreviewParams(max_size=256),
+                DatasetParams(),
+                StatisticsParams(),
+                HistogramParams(),
+            )
+        except Exception as e:
+            warnings.warn(f"Could not precompute statistics: {e}")
+
+    async def _start_precompute_statistics(self):
+        """Start statistics computation in background."""
+        task = asyncio.ensure_future(self.executor.run(self._precompute_statistics))
+        # keep a reference to the task until it's done
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _query_key(self, request: Request, exclude: Sequence[str] = ()) -> Tuple:
+        """Return normalized query parameters (sorted by name, values order kept)."""
+        return tuple(
+            sorted(
+                (
+                    (key, value)
+                    for (key, value) in request.query_params.multi_items()
+                    if key not in exclude and value != ""
+                ),
+                key=lambda kv: kv[0],
+            )
+        )
+
+    def _get_tile_exists(self) -> Callable[[int, int, int], bool]:
+        """Return the reader `tile_exists` method (memoized).
+
+        It only checks the tile against the dataset bounds (or the mosaic spatial
+        index), so it can be called after the reader is released.
+
+        """
+
+        def _tile_exists():
+            with self.pool.get() as src_dst:
+                return src_dst.tile_exists
+
+        return self._memoize("tile_exists", _tile_exists)
+
+    async def _tile_exists(self, x: int, y: int, z: int) -> bool:
+        """Check if a tile intersects the dataset, without reading it."""
+        await self._check_version_async()
+        tile_exists = self.metadata_cache.get("tile_exists")
+        if tile_exists is None:
+            tile_exists = await self.executor.run(self._get_tile_exists)
+
+        return tile_exists(x, y, z)
+
+    def _empty_tile(
+        self, x: int, y: int, z: int, format: Optional[TileFormat], tilesize: int
+    ) -> Response:
+        """Return the response for a tile outside the dataset."""
+        if self.empty_tiles == "404":
+            return JSONResponse(
+                content={"detail": f"Tile(x={x}, y={y}, z={z}) is outside bounds"},
+                status_code=404,
+            )
+
+        # Only PNG (the default format for masked tiles) and WebP have transparency
+        format = format or RasterFormat.png
+        if self.empty_tiles == "204" or format not in TRANSPARENT_FORMATS:
+            return Response(status_code=204)
+
+        key = (format, tilesize)
+        if key not in self._empty_tile_cache:
+            image = ImageData(numpy.ma.masked_all((1, tilesize, tilesize), dtype="uint8"))
+            self._empty_tile_cache[key] = render_image(image, output_format=format)
+
+        content, media_type = self._empty_tile_cache[key]
+        return Response(content, media_type=media_type)
+
+    async def _single_flight(self, request: Request, func: Callable[[], Any]) -> Any:
+        """Run `func` in the executor, sharing its result with identical requests."""
+        key = (request.method, request.url.path, self._query_key(request))
+        return await self.in_flight.do(key, partial(self.executor.run, func))
+
     def register_routes(self):  # noqa
         """Register routes to the FastAPI app."""
         img_media_types = {
@@ -198,12 +621,18 @@ class viz:
             responses={200: {"description": "Return the info of the COG."}},
             tags=["API"],
         )
-        def info(params=Depends(self.info_dependency)):
+        @self.executor.wrap
+        def info(request: Request, params=Depends(self.info_dependency)):
             """Handle /info requests."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:
-                # Adapt options for each reader type
-                self._update_params(src_dst, params)
-                return src_dst.info(**params.as_dict())
+
+            def _info():
+                with self.pool.get() as src_dst:
+                    # Adapt options for each reader type
+                    self._update_params(src_dst, params)
+                    with timer("read"):
+                        return src_dst.info(**params.as_dict())
+
+            return self._memoize(("info", self._query_key(request)), _info)
 
         @self.router.get(
             "/info.geojson",
@@ -221,31 +650,37 @@ class viz:
             },
             tags=["API"],
         )
+        @self.executor.wrap
         def info_geojson(
+            request: Request,
             params=Depends(self.info_dependency),
             crs=Depends(CRSParams),
         ):
             """Handle /info requests."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:
-                bounds = src_dst.get_geographic_bounds(crs or WGS84_CRS)
-                if bounds[0] > bounds[2]:
-                    pl = Polygon.from_bounds(-180, bounds[1], bounds[2], bounds[3])
-                    pr = Polygon.from_bounds(bounds[0], bounds[1], 180, bounds[3])
-                    geometry = MultiPolygon(
-                        type="MultiPolygon",
-                        coordinates=[pl.coordinates, pr.coordinates],
+
+            def _info():
+                with self.pool.get() as src_dst:
+                    bounds = src_dst.get_geographic_bounds(crs or WGS84_CRS)
+                    if bounds[0] > bounds[2]:
+                        pl = Polygon.from_bounds(-180, bounds[1], bounds[2], bounds[3])
+                        pr = Polygon.from_bounds(bounds[0], bounds[1], 180, bounds[3])
+                        geometry = MultiPolygon(
+                            type="MultiPolygon",
+                            coordinates=[pl.coordinates, pr.coordinates],
+                        )
+                    else:
+                        geometry = Polygon.from_bounds(*bounds)
+
+                    # Adapt options for each reader type
+                    self._update_params(src_dst, params)
+                    return Feature(
+                        type="Feature",
+                        bbox=bounds,
+                        geometry=geometry,
+                        properties=src_dst.info(**params.as_dict()),
                     )
-                else:
-                    geometry = Polygon.from_bounds(*bounds)
 
-                # Adapt options for each reader type
-                self._update_params(src_dst, params)
-                return Feature(
-                    type="Feature",
-                    bbox=bounds,
-                    geometry=geometry,
-                    properties=src_dst.info(**params.as_dict()),
-                )
+            return self._memoize(("info.geojson", self._query_key(request)), _info)
 
         @self.router.get(
             "/statistics",
@@ -258,7 +693,9 @@ class viz:
             responses={200: {"description": "Return the statistics of the COG."}},
             tags=["API"],
         )
+        @self.executor.wrap
         def statistics(
+            request: Request,
             layer_params=Depends(self.statistics_dependency),
             image_params: PreviewParams = Depends(),
             dataset_params: DatasetParams = Depends(),
@@ -266,20 +703,14 @@ class viz:
             histogram_params: HistogramParams = Depends(),
         ):
             """Handle /stats requests."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:
-                if self.nodata is not None and dataset_params.nodata is None:
-                    dataset_params.nodata = self.nodata
-
-                # Adapt options for each reader type
-                self._update_params(src_dst, layer_params)
-
-                return src_dst.statistics(
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
-                    **image_params.as_dict(),
-                    **stats_params.as_dict(),
-                    hist_options=histogram_params.as_dict(),
-                )
+            return self._get_statistics(
+                self._query_key(request),
+                layer_params,
+                image_params,
+                dataset_params,
+                stats_params,
+                histogram_params,
+            )
 
         @self.router.get(
             "/point",
@@ -287,6 +718,7 @@ class viz:
             response_class=JSONResponse,
             tags=["API"],
         )
+        @self.executor.wrap
         def point(
             coordinates: Annotated[
                 str,
@@ -294,22 +726,25 @@ class viz:
             ],
             layer_params=Depends(self.layer_dependency),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
         ):
             """Handle /point requests."""
             lon, lat = list(map(float, coordinates.split(",")))
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
+            with self.pool.get() as src_dst:
                 if self.nodata is not None and dataset_params.nodata is None:
                     dataset_params.nodata = self.nodata
 
                 # Adapt options for each reader type
                 self._update_params(src_dst, layer_params)
 
-                pts = src_dst.point(
-                    lon,
-                    lat,
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
-                )
+                with timer("read"):
+                    pts = src_dst.point(
+                        lon,
+                        lat,
+                        **layer_params.as_dict(),
+                        **dataset_params.as_dict(),
+                        **mosaic_params.as_dict(),
+                    )
 
             return {
                 "coordinates": [lon, lat],
@@ -317,6 +752,137 @@ class viz:
                 "band_names": pts.band_names,
             }
 
+        @self.router.post(
+            "/points",
+            responses={200: {"description": "Return the values of many points."}},
+            response_class=JSONResponse,
+            tags=["API"],
+        )
+        @self.executor.wrap
+        def points(
+            body: Union[Feature[MultiPoint, Any], MultiPoint, Points],
+            layer_params=Depends(self.layer_dependency),
+            dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
+            coord_crs=Depends(CoordCRSParams),
+        ):
+            """Handle /points requests.
+
+            Values are returned by band (`values[band][point]`), `null` for the
+            points outside the dataset or masked.
+
+            """
+            geometry = body.geometry if isinstance(body, Feature) else body
+            coordinates = [tuple(position)[:2] for position in geometry.coordinates]
+            xs = [x for x, _ in coordinates]
+            ys = [y for _, y in coordinates]
+
+            with self.pool.get() as src_dst:
+                if self.nodata is not None and dataset_params.nodata is None:
+                    dataset_params.nodata = self.nodata
+
+                # Adapt options for each reader type
+                self._update_params(src_dst, layer_params)
+
+                options = {
+                    "coord_crs": coord_crs or WGS84_CRS,
+                    **layer_params.as_dict(),
+                    **dataset_params.as_dict(),
+                }
+                with timer("read"):
+                    # Points are grouped by dataset and block when possible
+                    if hasattr(src_dst, "points"):
+                        values, band_names = src_dst.points(
+                            xs, ys, **options, **mosaic_params.as_dict()
+                        )
+                    elif self.reader_type == "cog":
+                        values, band_names = read_points(src_dst, xs, ys, **options)
+                    else:
+                        values, band_names = read_points_each(src_dst, xs, ys, **options)
+
+            return {
+                "coordinates": [list(c) for c in coordinates],
+                "band_names": band_names,
+                "values": values.tolist(),
+            }
+
+        if hasattr(self.reader, "timeseries"):
+
+            @self.router.get(
+                "/timeseries/point",
+                responses={
+                    200: {"description": "Return the values of points in every file."}
+                },
+                response_class=JSONResponse,
+                tags=["API"],
+            )
+            @self.executor.wrap
+            def timeseries_point(
+                coordinates: Annotated[
+                    List[str],
+                    Query(
+                        description="Coma (',') delimited lon,lat coordinates (repeatable)"
+                    ),
+                ],
+                assets: Annotated[
+                    Optional[List[str]],
+                    Query(description="Assets to read (default to all)."),
+                ] = None,
+                window: Annotated[
+                    Optional[int],
+                    Query(gt=0, description="Aggregate the values by `window` files."),
+                ] = None,
+                aggregation: Annotated[
+                    Literal["mean", "min", "max"],
+                    Query(description="Window aggregation method."),
+                ] = "mean",
+                layer_params=Depends(BidxExprParams),
+                dataset_params: DatasetParams = Depends(),
+                coord_crs=Depends(CoordCRSParams),
+            ):
+                """Handle /timeseries/point requests.
+
+                Values are returned by file (or window of files), band and point
+                (`values[file][band][point]`), `null` for the points outside the
+                files or masked.
+
+                """
+                points = [list(map(float, c.split(","))) for c in coordinates]
+                xs = [x for x, _ in points]
+                ys = [y for _, y in points]
+
+                with self.pool.get() as src_dst:
+                    if self.nodata is not None and dataset_params.nodata is None:
+                        dataset_params.nodata = self.nodata
+
+                    with timer("read"):
+                        values, names, band_names = src_dst.timeseries(
+                            xs,
+                            ys,
+                            assets=assets or self.layers,
+                            coord_crs=coord_crs or WGS84_CRS,
+                            **layer_params.as_dict(),
+                            **dataset_params.as_dict(),
+                        )
+
+                response = {
+                    "coordinates": points,
+                    "assets": names,
+                    "band_names": band_names,
+                }
+
+                if window:
+                    with timer("post_process"):
+                        values = aggregate_windows(values, window, aggregation)
+
+                    response["windows"] = [
+                        names[ix : ix + window] for ix in range(0, len(names), window)
+                    ]
+                    response["aggregation"] = aggregation
+
+                response["values"] = values.tolist()
+                return response
+
         preview_params = {
             "responses": {
                 200: {"content": img_media_types, "description": "Return a preview."}
@@ -327,40 +893,49 @@ class viz:
 
         @self.router.get("/preview", **preview_params, tags=["API"])
         @self.router.get("/preview.{format}", **preview_params, tags=["API"])
-        def preview(
+        async def preview(
+            request: Request,
             format: Optional[RasterFormat] = None,
             layer_params=Depends(self.layer_dependency),
             img_params: PreviewParams = Depends(),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             colormap: ColorMapParams = Depends(),
             post_process=Depends(available_algorithms.dependency),
         ):
             """Handle /preview requests."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
-                if self.nodata is not None and dataset_params.nodata is None:
-                    dataset_params.nodata = self.nodata
 
-                # Adapt options for each reader type
-                self._update_params(src_dst, layer_params)
+            def _render() -> Tuple[bytes, str]:
+                with self.pool.get() as src_dst:
+                    if self.nodata is not None and dataset_params.nodata is None:
+                        dataset_params.nodata = self.nodata
 
-                image = src_dst.preview(
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
-                    **img_params.as_dict(),
-                )
-                dst_colormap = getattr(src_dst, "colormap", None)
+                    # Adapt options for each reader type
+                    self._update_params(src_dst, layer_params)
 
-            if post_process:
-                image = post_process(image)
+                    with timer("read"):
+                        image = src_dst.preview(
+                            **layer_params.as_dict(),
+                            **dataset_params.as_dict(),
+                            **mosaic_params.as_dict(),
+                            **img_params.as_dict(),
+                        )
+                    dst_colormap = getattr(src_dst, "colormap", None)
 
-            content, media_type = render_image(
-                image,
-                output_format=format,
-                colormap=colormap or dst_colormap,
-                **render_params.as_dict(),
-            )
+                if post_process:
+                    with timer("post_process"):
+                        image = post_process(image)
+
+                with timer("render"):
+                    return render_image(
+                        image,
+                        output_format=format,
+                        colormap=colormap or dst_colormap,
+                        **render_params.as_dict(),
+                    )
 
+            content, media_type = await self._single_flight(request, _render)
             return Response(content, media_type=media_type)
 
         part_params = {
@@ -384,7 +959,8 @@ class viz:
             **part_params,
             tags=["API"],
         )
-        def part(
+        async def part(
+            request: Request,
             minx: Annotated[float, Path(description="Bounding box min X")],
             miny: Annotated[float, Path(description="Bounding box min Y")],
             maxx: Annotated[float, Path(description="Bounding box max X")],
@@ -396,6 +972,7 @@ class viz:
             layer_params=Depends(self.layer_dependency),
             img_params: PartFeatureParams = Depends(),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             colormap: ColorMapParams = Depends(),
             dst_crs=Depends(DstCRSParams),
@@ -403,33 +980,40 @@ class viz:
             post_process=Depends(available_algorithms.dependency),
         ):
             """Create image from part of a dataset."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
-                if self.nodata is not None and dataset_params.nodata is None:
-                    dataset_params.nodata = self.nodata
-
-                # Adapt options for each reader type
-                self._update_params(src_dst, layer_params)
-
-                image = src_dst.part(
-                    [minx, miny, maxx, maxy],
-                    dst_crs=dst_crs,
-                    bounds_crs=coord_crs or WGS84_CRS,
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
-                    **img_params.as_dict(),
-                )
-                dst_colormap = getattr(src_dst, "colormap", None)
 
-            if post_process:
-                image = post_process(image)
+            def _render() -> Tuple[bytes, str]:
+                with self.pool.get() as src_dst:
+                    if self.nodata is not None and dataset_params.nodata is None:
+                        dataset_params.nodata = self.nodata
+
+                    # Adapt options for each reader type
+                    self._update_params(src_dst, layer_params)
+
+                    with timer("read"):
+                        image = src_dst.part(
+                            [minx, miny, maxx, maxy],
+                            dst_crs=dst_crs,
+                            bounds_crs=coord_crs or WGS84_CRS,
+                            **layer_params.as_dict(),
+                            **dataset_params.as_dict(),
+                            **mosaic_params.as_dict(),
+                            **img_params.as_dict(),
+                        )
+                    dst_colormap = getattr(src_dst, "colormap", None)
 
-            content, media_type = render_image(
-                image,
-                output_format=format,
-                colormap=colormap or dst_colormap,
-                **render_params.as_dict(),
-            )
+                if post_process:
+                    with timer("post_process"):
+                        image = post_process(image)
+
+                with timer("render"):
+                    return render_image(
+                        image,
+                        output_format=format,
+                        colormap=colormap or dst_colormap,
+                        **render_params.as_dict(),
+                    )
 
+            content, media_type = await self._single_flight(request, _render)
             return Response(content, media_type=media_type)
 
         feature_params = {
@@ -448,40 +1032,46 @@ class viz:
         @self.router.post(
             "/feature/{width}x{height}.{format}", **feature_params, tags=["API"]
         )
+        @self.executor.wrap
         def geojson_part(
             geom: Feature,
             format: Annotated[Optional[RasterFormat], "Output image type."] = None,
             layer_params=Depends(self.layer_dependency),
             img_params: PartFeatureParams = Depends(),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             colormap: ColorMapParams = Depends(),
             post_process=Depends(available_algorithms.dependency),
         ):
             """Handle /feature requests."""
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
+            with self.pool.get() as src_dst:
                 if self.nodata is not None and dataset_params.nodata is None:
                     dataset_params.nodata = self.nodata
 
                 # Adapt options for each reader type
                 self._update_params(src_dst, layer_params)
 
-                image = src_dst.feature(
-                    geom.model_dump(exclude_none=True),
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
-                )
+                with timer("read"):
+                    image = src_dst.feature(
+                        geom.model_dump(exclude_none=True),
+                        **layer_params.as_dict(),
+                        **dataset_params.as_dict(),
+                        **mosaic_params.as_dict(),
+                    )
                 dst_colormap = getattr(src_dst, "colormap", None)
 
             if post_process:
-                image = post_process(image)
+                with timer("post_process"):
+                    image = post_process(image)
 
-            content, media_type = render_image(
-                image,
-                output_format=format,
-                colormap=colormap or dst_colormap,
-                **render_params.as_dict(),
-            )
+            with timer("render"):
+                content, media_type = render_image(
+                    image,
+                    output_format=format,
+                    colormap=colormap or dst_colormap,
+                    **render_params.as_dict(),
+                )
 
             return Response(content, media_type=media_type)
 
@@ -502,7 +1092,8 @@ class viz:
         @self.router.get(
             "/tiles/WebMercatorQuad/{z}/{x}/{y}.{format}", **tile_params, tags=["API"]
         )
-        def tile(
+        async def tile(
+            request: Request,
             z: Annotated[
                 int,
                 Path(
@@ -524,6 +1115,7 @@ class viz:
             format: Annotated[TileFormat, "Output tile type."] = None,
             layer_params=Depends(self.layer_dependency),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             tile_params: TileParams = Depends(),
             colormap: ColorMapParams = Depends(),
@@ -545,60 +1137,92 @@ class viz:
 
             tilesize = tilesize or default_tilesize
 
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
-                if self.nodata is not None and dataset_params.nodata is None:
-                    dataset_params.nodata = self.nodata
+            # Tiles outside the dataset (or every mosaic footprint) are answered
+            # without reading the data
+            if not await self._tile_exists(x, y, z):
+                return self._empty_tile(x, y, z, format, tilesize)
 
-                # Adapt options for each reader type
-                self._update_params(src_dst, layer_params)
-
-                image = src_dst.tile(
+            cache_key = None
+            if self.tile_cache.maxsize:
+                await self._check_version_async()
+                cache_key = (
+                    z,
                     x,
                     y,
-                    z,
-                    tilesize=tilesize,
-                    **tile_params.as_dict(),
-                    **layer_params.as_dict(),
-                    **dataset_params.as_dict(),
+                    format.value if format else None,
+                    tilesize,
+                    self._query_key(request, exclude=["tilesize"]),
                 )
+                if cached := self.tile_cache.get(cache_key):
+                    content, media_type = cached
+                    return Response(content, media_type=media_type)
+
+            def _render() -> Tuple[bytes, str]:
+                with self.pool.get() as src_dst:
+                    if self.nodata is not None and dataset_params.nodata is None:
+                        dataset_params.nodata = self.nodata
+
+                    # Adapt options for each reader type
+                    self._update_params(src_dst, layer_params)
+
+                    with timer("read"):
+                        image = src_dst.tile(
+                            x,
+                            y,
+                            z,
+                            tilesize=tilesize,
+                            **tile_params.as_dict(),
+                            **layer_params.as_dict(),
+                            **dataset_params.as_dict(),
+                            **mosaic_params.as_dict(),
+                        )
+
+                    dst_colormap = getattr(src_dst, "colormap", None)
+
+                # Vector Tile
+                if format and format in VectorTileFormat:
+                    if not pixels_encoder:
+                        raise HTTPException(
+                            status_code=500,
+                            detail="rio-tiler-mvt not found, please do pip install rio-viz['mvt']",
+                        )
+
+                    if not feature_type:
+                        raise HTTPException(
+                            status_code=500,
+                            detail="missing feature_type for vector tile.",
+                        )
+
+                    with timer("encode"):
+                        content = pixels_encoder(
+                            image.data,
+                            image.mask,
+                            image.band_names,
+                            feature_type=feature_type,
+                        )
+
+                    media_type = format.mediatype
+
+                # Raster Tile
+                else:
+                    if post_process:
+                        with timer("post_process"):
+                            image = post_process(image)
 
-                dst_colormap = getattr(src_dst, "colormap", None)
-
-            # Vector Tile
-            if format and format in VectorTileFormat:
-                if not pixels_encoder:
-                    raise HTTPException(
-                        status_code=500,
-                        detail="rio-tiler-mvt not found, please do pip install rio-viz['mvt']",
-                    )
-
-                if not feature_type:
-                    raise HTTPException(
-                        status_code=500,
-                        detail="missing feature_type for vector tile.",
-                    )
-
-                content = pixels_encoder(
-                    image.data,
-                    image.mask,
-                    image.band_names,
-                    feature_type=feature_type,
-                )
+                    with timer("render"):
+                        content, media_type = render_image(
+                            image,
+                            output_format=format,
+                            colormap=colormap or dst_colormap,
+                            **render_params.as_dict(),
+                        )
 
-                media_type = format.mediatype
+                if cache_key:
+                    self.tile_cache.set(cache_key, (content, media_type), len(content))
 
-            # Raster Tile
-            else:
-                if post_process:
-                    image = post_process(image)
-
-                content, media_type = render_image(
-                    image,
-                    output_format=format,
-                    colormap=colormap or dst_colormap,
-                    **render_params.as_dict(),
-                )
+                return content, media_type
 
+            content, media_type = await self._single_flight(request, _render)
             return Response(content, media_type=media_type)
 
         @self.router.get(
@@ -608,6 +1232,7 @@ class viz:
             response_model_exclude_none=True,
             tags=["API"],
         )
+        @self.executor.wrap
         def tilejson(
             request: Request,
             tile_format: Annotated[
@@ -616,6 +1241,7 @@ class viz:
             ] = None,
             layer_params=Depends(self.layer_dependency),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             colormap: ColorMapParams = Depends(),
             post_process=Depends(available_algorithms.dependency),
@@ -643,21 +1269,11 @@ class viz:
             if qs:
                 tile_url += f"?{urllib.parse.urlencode(qs)}"
 
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
-                bounds = (
-                    self.bounds
-                    if self.bounds is not None
-                    else src_dst.get_geographic_bounds(
-                        src_dst.tms.rasterio_geographic_crs
-                    )
-                )
-                minzoom = self.minzoom if self.minzoom is not None else src_dst.minzoom
-                maxzoom = self.maxzoom if self.maxzoom is not None else src_dst.maxzoom
-
+            metadata = self._get_metadata()
             return {
-                "bounds": bounds,
-                "minzoom": minzoom,
-                "maxzoom": maxzoom,
+                "bounds": metadata["bounds"],
+                "minzoom": metadata["minzoom"],
+                "maxzoom": metadata["maxzoom"],
                 "name": "rio-viz",
                 "tilejson": "2.1.0",
                 "tiles": [tile_url],
@@ -666,6 +1282,7 @@ class viz:
         @self.router.get(
             "/WMTSCapabilities.xml", response_class=XMLResponse, tags=["API"]
         )
+        @self.executor.wrap
         def wmts(
             request: Request,
             tile_format: Annotated[
@@ -674,6 +1291,7 @@ class viz:
             ] = RasterFormat.png,
             layer_params=Depends(self.layer_dependency),
             dataset_params: DatasetParams = Depends(),
+            mosaic_params=Depends(self.mosaic_dependency),
             render_params: ImageRenderingParams = Depends(),
             colormap: ColorMapParams = Depends(),
             post_process=Depends(available_algorithms.dependency),
@@ -705,37 +1323,14 @@ class viz:
             if qs:
                 tiles_endpoint += f"?{urllib.parse.urlencode(qs)}"
 
-            with self.reader(self.src_path, **self.reader_params) as src_dst:  # type: ignore
-                bounds = (
-                    self.bounds
-                    if self.bounds is not None
-                    else src_dst.get_geographic_bounds(
-                        src_dst.tms.rasterio_geographic_crs
-                    )
-                )
-                minzoom = self.minzoom if self.minzoom is not None else src_dst.minzoom
-                maxzoom = self.maxzoom if self.maxzoom is not None else src_dst.maxzoom
-
-            tileMatrix = []
-            for zoom in range(minzoom, maxzoom + 1):  # type: ignore
-                tm = f"""<TileMatrix>
-                    <ows:Identifier>{zoom}</ows:Identifier>
-                    <ScaleDenominator>{559082264.02872 / 2 ** zoom / 1}</ScaleDenominator>
-                    <TopLeftCorner>-20037508.34278925 20037508.34278925</TopLeftCorner>
-                    <TileWidth>256</TileWidth>
-                    <TileHeight>256</TileHeight>
-                    <MatrixWidth>{2 ** zoom}</MatrixWidth>
-                    <MatrixHeight>{2 ** zoom}</MatrixHeight>
-                </TileMatrix>"""
-                tileMatrix.append(tm)
-
+            metadata = self._get_metadata()
             return templates.TemplateResponse(
                 request,
                 name="wmts.xml",
                 context={
                     "tiles_endpoint": tiles_endpoint,
-                    "bounds": bounds,
-                    "tileMatrix": tileMatrix,
+                    "bounds": metadata["bounds"],
+                    "tileMatrix": metadata["tile_matrix"],
                     "title": "Cloud Optimized GeoTIFF",
                     "layer_name": "cogeo",
                     "media_type": tile_format.mediatype,
@@ -743,6 +1338,44 @@ class viz:
                 media_type="application/xml",
             )
 
+        @self.router.get(
+            "/cache",
+            responses={200: {"description": "Return rendered tiles cache statistics."}},
+            response_class=JSONResponse,
+            tags=["Server"],
+        )
+        def cache_statistics():
+            """Handle /cache requests."""
+            return self.tile_cache.stats()
+
+        @self.router.get(
+            "/executor",
+            responses={200: {"description": "Return executor queue statistics."}},
+            response_class=JSONResponse,
+            tags=["Server"],
+        )
+        def executor_statistics():
+            """Handle /executor requests."""
+            return self.executor.stats()
+
+        @self.router.get(
+            "/metrics",
+            responses={
+                200: {
+                    "content": {"text/plain": {}},
+                    "description": "Return server metrics in Prometheus text format.",
+                }
+            },
+            response_class=PlainTextResponse,
+            tags=["Server"],
+        )
+        def metrics():
+            """Handle /metrics requests."""
+            return PlainTextResponse(
+                self.metrics.render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
         @self.router.get("/map", response_class=HTMLResponse)
         def map_viewer(
             request: Request,
@@ -825,10 +1458,58 @@ class viz:
         """Get simple app template url."""
         return f"http://{self.host}:{self.port}/docs"
 
-    def start(self):
-        """Start tile server."""
+    def settings(self) -> Dict:
+        """Return JSON serializable constructor arguments (used to rebuild the app)."""
+        settings = {
+            field.name: getattr(self, field.name)
+            for field in attr.fields(type(self))
+            if field.init and field.name != "app"
+        }
+        settings["reader"] = f"{self.reader.__module__}.{self.reader.__qualname__}"
+        return settings
+
+    def settings_json(self) -> str:
+        """Return the settings as JSON (used to rebuild the app in the workers)."""
+        settings = self.settings()
+        for name, value in settings.items():
+            try:
+                json.dumps(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Setting `{name}` must be JSON serializable, got {value!r}: {e}"
+                ) from e
+
+        return json.dumps(settings, sort_keys=True)
+
+    def start(self, workers: int = 1, timeout_graceful_shutdown: Optional[int] = None):
+        """Start tile server.
+
+        With `workers > 1`, uvicorn starts multiple processes sharing the listening
+        socket, each one rebuilding the application with `create_app`. Workers are
+        restarted when they die, or all at once on `SIGHUP`, so the settings must
+        then be JSON serializable (see `settings_json`).
+
+        """
         with rasterio.Env(**self.config):
-            uvicorn.run(app=self.app, host=self.host, port=self.port, log_level="info")
+            if workers > 1:
+                os.environ[SETTINGS_ENV] = self.settings_json()
+                uvicorn.run(
+                    "rio_viz.app:create_app",
+                    factory=True,
+                    host=self.host,
+                    port=self.port,
+                    workers=workers,
+                    timeout_graceful_shutdown=timeout_graceful_shutdown,
+                    log_level="info",
+                )
+            else:
+                uvicorn.run(
+                    app=self.app,
+                    host=self.host,
+                    port=self.port,
+                    timeout_graceful_shutdown=timeout_graceful_shutdown,
+                    log_level="info",
+                )
 
 
 @attr.s
@@ -851,3 +1532,14 @@ class Client(viz):
     def shutdown(self):
         """Stop server"""
         ServerManager.shutdown_server(f"{self.host}:{self.port}")
+        self.pool.close()
+
+
+def create_app() -> FastAPI:
+    """Create the FastAPI application from the `RIO_VIZ_SETTINGS` environment variable."""
+    settings = json.loads(os.environ[SETTINGS_ENV])
+
+    module, classname = settings.pop("reader").rsplit(".", 1)
+    reader = getattr(importlib.import_module(module), classname)
+
+    return viz(reader=reader, **settings).app
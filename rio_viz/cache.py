@@ -0,0 +1,148 @@
+"""rio-viz in-memory caches."""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import attr
+from braceexpand import braceexpand
+
+
+@attr.s
+class LRUCache:
+    """Thread-safe Least Recently Used cache with a size budget.
+
+    Args:
+        maxsize (int): Maximum total size of the cached values (e.g in bytes, or in
+            number of items when each value is set with `size=1`). Set to `0` to
+            disable the cache. Defaults to `0`.
+
+    """
+
+    maxsize: int = attr.ib(default=0)
+
+    hits: int = attr.ib(init=False, default=0)
+    misses: int = attr.ib(init=False, default=0)
+    currsize: int = attr.ib(init=False, default=0)
+
+    _data: "OrderedDict[Hashable, Tuple[Any, int]]" = attr.ib(
+        init=False, factory=OrderedDict
+    )
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get value from the cache and mark it as most recently used."""
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int):
+        """Add value (of `size`) to the cache, evicting least recently used values."""
+        if size > self.maxsize:
+            return
+
+        with self._lock:
+            if key in self._data:
+                _, previous = self._data.pop(key)
+                self.currsize -= previous
+
+            while self._data and self.currsize + size > self.maxsize:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.currsize -= evicted
+
+            self._data[key] = (value, size)
+            self.currsize += size
+
+    def clear(self):
+        """Remove all values from the cache."""
+        with self._lock:
+            self._data.clear()
+            self.currsize = 0
+
+    def __len__(self) -> int:
+        """Number of cached values."""
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache statistics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "count": len(self._data),
+            "currsize": self.currsize,
+            "maxsize": self.maxsize,
+        }
+
+
+def get_dataset_version(src_path: str) -> Tuple:
+    """Return modification time and size of the (brace expanded) local files.
+
+    Non-local files (e.g URLs) are ignored.
+
+    """
+    version = []
+    for path in braceexpand(src_path):
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            continue
+
+        version.append((path, stat.st_mtime_ns, stat.st_size))
+
+    return tuple(version)
+
+
+@attr.s
+class SingleFlight:
+    """Coalesce identical in-flight calls.
+
+    While a call for a given key is running, later calls with the same key wait
+    for it to finish and get the same result (or exception) instead of running
+    the function again.
+
+    """
+
+    _calls: Dict[Hashable, Future] = attr.ib(init=False, factory=dict)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `func()` or the result of an identical in-flight call."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            # shield the shared future from the cancellation of this waiter
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await func()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+        return result
+
+    def __len__(self) -> int:
+        """Number of in-flight calls."""
+        return len(self._calls)
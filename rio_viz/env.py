@@ -0,0 +1,63 @@
+"""rio-viz GDAL environment forwarding.
+
+rasterio's environment (and GDAL config options) are thread local, so the options
+set in a thread (e.g the `--config` options of the executor threads) don't apply
+to the threads it starts to read files in parallel.
+
+"""
+
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Iterator, Type
+
+import rasterio
+from rasterio.env import getenv, hasenv
+
+
+def _forwarded_env() -> Callable[[], ContextManager]:
+    """Return a context manager factory entering the calling thread GDAL configuration.
+
+    Nothing is done when there is no GDAL environment or in the calling thread.
+
+    """
+    if not hasenv():
+        return nullcontext
+
+    options = getenv()
+    caller = threading.get_ident()
+
+    def _env() -> ContextManager:
+        if threading.get_ident() == caller:
+            return nullcontext()
+
+        return rasterio.Env(**options)
+
+    return _env
+
+
+def in_env(func: Callable) -> Callable:
+    """Forward the calling thread GDAL configuration to the threads calling `func`."""
+    env = _forwarded_env()
+
+    def _func(*args: Any, **kwargs: Any) -> Any:
+        with env():
+            return func(*args, **kwargs)
+
+    return _func
+
+
+def reader_in_env(reader: Type) -> Callable[..., ContextManager]:
+    """Forward the calling thread GDAL configuration to the threads using `reader`.
+
+    The returned opener is used as the reader class (`with opener(...) as src_dst`)
+    and keeps the configuration for the reader lifetime.
+
+    """
+    env = _forwarded_env()
+
+    @contextmanager
+    def _open(*args: Any, **kwargs: Any) -> Iterator[Any]:
+        with env(), reader(*args, **kwargs) as src_dst:
+            yield src_dst
+
+    return _open
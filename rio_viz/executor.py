@@ -0,0 +1,163 @@
+"""rio-viz bounded executor."""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+import attr
+
+
+class ExecutorError(Exception):
+    """Base exception for executor errors."""
+
+
+class ExecutorSaturated(ExecutorError):
+    """The executor queue is full."""
+
+
+class ExecutorTimeout(ExecutorError):
+    """The task waited too long in the executor queue."""
+
+
+def _default_max_workers() -> int:
+    """Same default as concurrent.futures.ThreadPoolExecutor."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+@attr.s
+class BoundedExecutor:
+    """Thread pool with a bounded queue.
+
+    Tasks are rejected with `ExecutorSaturated` when `max_queue` tasks are already
+    waiting for a thread, and with `ExecutorTimeout` if they could not start within
+    `max_wait` seconds.
+
+    Args:
+        max_workers (int, optional): Number of threads. Defaults to `min(32, cpu_count + 4)`.
+        max_queue (int): Maximum number of tasks waiting for a thread. Defaults to `100`.
+        max_wait (float, optional): Maximum number of seconds a task can wait for a
+            thread. Set to `None` to wait indefinitely. Defaults to `30`.
+        initializer (callable, optional): Function to call in every new thread.
+
+    """
+
+    max_workers: int = attr.ib(
+        default=None,
+        converter=attr.converters.default_if_none(factory=_default_max_workers),
+    )
+    max_queue: int = attr.ib(default=100)
+    max_wait: Optional[float] = attr.ib(default=30.0)
+    initializer: Optional[Callable[[], Any]] = attr.ib(default=None)
+
+    # Counters
+    pending: int = attr.ib(init=False, default=0)
+    running: int = attr.ib(init=False, default=0)
+    completed: int = attr.ib(init=False, default=0)
+    rejected: int = attr.ib(init=False, default=0)
+    expired: int = attr.ib(init=False, default=0)
+
+    _executor: Optional[ThreadPoolExecutor] = attr.ib(init=False, default=None)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    @property
+    def queued(self) -> int:
+        """Number of tasks waiting for a thread."""
+        return self.pending - self.running
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool (created on first use)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="rio-viz",
+                initializer=self.initializer,
+            )
+
+        return self._executor
+
+    def _run(self, ctx: contextvars.Context, func: Callable, *args, **kwargs) -> Any:
+        """Run the task in the caller context and track running tasks."""
+        with self._lock:
+            self.running += 1
+
+        try:
+            return ctx.run(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _done(self, future: Future):
+        """Update counters when a task is done (or cancelled)."""
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                self.expired += 1
+            else:
+                self.completed += 1
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run `func(*args, **kwargs)` in the thread pool and await its result."""
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated("Too many requests waiting to be processed.")
+
+            self.pending += 1
+            try:
+                future = self._get_executor().submit(
+                    self._run, contextvars.copy_context(), func, *args, **kwargs
+                )
+            except BaseException:
+                self.pending -= 1
+                raise
+
+        future.add_done_callback(self._done)
+
+        result = asyncio.wrap_future(future)
+        if not self.max_wait:
+            return await result
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), self.max_wait)
+        except asyncio.TimeoutError:
+            # The task didn't start, give up
+            if future.cancel():
+                raise ExecutorTimeout(
+                    f"Request waited more than {self.max_wait}s to be processed."
+                ) from None
+
+        return await result
+
+    def wrap(self, func: Callable) -> Callable:
+        """Return a coroutine function running `func` in the thread pool."""
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        return wrapper
+
+    def shutdown(self, wait: bool = False):
+        """Stop the thread pool (a new one is created on next use)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return executor statistics."""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
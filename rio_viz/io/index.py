@@ -0,0 +1,125 @@
+"""rio-viz spatial index."""
+
+import math
+from typing import List, Sequence, Tuple
+
+import attr
+import numpy
+
+BBox = Tuple[float, float, float, float]
+
+
+@attr.s
+class STRTree:
+    """Static R-tree packed with the Sort-Tile-Recursive algorithm.
+
+    Footprints crossing the antimeridian (`minx > maxx`) are indexed as two boxes.
+
+    Args:
+        bounds (sequence): Footprints (minx, miny, maxx, maxy) of the items.
+        node_capacity (int): Maximum number of children per node. Defaults to `16`.
+
+    Examples:
+        >>> tree = STRTree([(0, 0, 1, 1), (10, 10, 11, 11)])
+            tree.query((0.5, 0.5, 2, 2))
+            [0]
+
+    """
+
+    bounds: Sequence[BBox] = attr.ib()
+    node_capacity: int = attr.ib(default=16)
+
+    # Boxes of each level, from the entries to the root. Node `i` of a level
+    # covers the entries `[i * node_capacity, (i + 1) * node_capacity)` of the
+    # level below.
+    _levels: List[numpy.ndarray] = attr.ib(init=False)
+    # Item index of the entries
+    _items: numpy.ndarray = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        """Build the tree."""
+        boxes = []
+        items = []
+        for ix, (minx, miny, maxx, maxy) in enumerate(self.bounds):
+            if minx > maxx:
+                boxes.extend([(minx, miny, 180.0, maxy), (-180.0, miny, maxx, maxy)])
+                items.extend([ix, ix])
+            else:
+                boxes.append((minx, miny, maxx, maxy))
+                items.append(ix)
+
+        entries = numpy.array(boxes, dtype="float64").reshape(-1, 4)
+        order = self._sort(entries)
+        self._items = numpy.array(items, dtype="int64")[order]
+
+        self._levels = [entries[order]]
+        while len(self._levels[-1]) > 1:
+            self._levels.append(self._pack(self._levels[-1]))
+
+    def _sort(self, boxes: numpy.ndarray) -> numpy.ndarray:
+        """Return STR order of the boxes (vertical slices, sorted by center y)."""
+        n = len(boxes)
+        if n == 0:
+            return numpy.arange(0)
+
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+
+        slice_size = self.node_capacity * math.ceil(
+            math.sqrt(math.ceil(n / self.node_capacity))
+        )
+
+        by_x = numpy.argsort(cx, kind="stable")
+        return numpy.concatenate(
+            [
+                chunk[numpy.argsort(cy[chunk], kind="stable")]
+                for chunk in (by_x[i : i + slice_size] for i in range(0, n, slice_size))
+            ]
+        )
+
+    def _pack(self, boxes: numpy.ndarray) -> numpy.ndarray:
+        """Return the boxes of the nodes grouping `node_capacity` consecutive boxes."""
+        offsets = numpy.arange(0, len(boxes), self.node_capacity)
+        return numpy.stack(
+            [
+                numpy.minimum.reduceat(boxes[:, 0], offsets),
+                numpy.minimum.reduceat(boxes[:, 1], offsets),
+                numpy.maximum.reduceat(boxes[:, 2], offsets),
+                numpy.maximum.reduceat(boxes[:, 3], offsets),
+            ],
+            axis=1,
+        )
+
+    def query(self, bbox: BBox) -> List[int]:
+        """Return the (sorted) indexes of the items intersecting `bbox`."""
+        minx, miny, maxx, maxy = bbox
+        if minx > maxx:
+            return sorted(
+                set(self.query((minx, miny, 180.0, maxy)))
+                | set(self.query((-180.0, miny, maxx, maxy)))
+            )
+
+        candidates = numpy.arange(len(self._levels[-1]))
+        for level in range(len(self._levels) - 1, -1, -1):
+            boxes = self._levels[level][candidates]
+            candidates = candidates[
+                (boxes[:, 0] <= maxx)
+                & (boxes[:, 2] >= minx)
+                & (boxes[:, 1] <= maxy)
+                & (boxes[:, 3] >= miny)
+            ]
+            if level == 0 or not len(candidates):
+                break
+
+            # children of the intersecting nodes
+            children = (
+                candidates[:, None] * self.node_capacity
+                + numpy.arange(self.node_capacity)
+            ).ravel()
+            candidates = children[children < len(self._levels[level - 1])]
+
+        return sorted(set(self._items[candidates].tolist()))
+
+    def __len__(self) -> int:
+        """Number of indexed items."""
+        return len(self.bounds)
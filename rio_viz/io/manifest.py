@@ -0,0 +1,201 @@
+"""rio-viz mosaic manifest."""
+
+import json
+import os
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import attr
+from rio_tiler.constants import WGS84_CRS
+
+from rio_viz.env import in_env
+
+MANIFEST_VERSION = 1
+
+
+def get_file_version(path: str) -> Tuple[Optional[int], Optional[int]]:
+    """Return modification time (ns) and size of a local file (`None` otherwise)."""
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None, None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+@attr.s(frozen=True)
+class Footprint:
+    """Dataset metadata needed to select and combine the mosaic datasets.
+
+    `mtime` and `size` are the dataset file modification time (in nanoseconds)
+    and size, used to check if a manifest entry is up to date (`None` for
+    non-local files).
+
+    """
+
+    bounds: Tuple[float, float, float, float] = attr.ib(converter=tuple)
+    minzoom: int = attr.ib()
+    maxzoom: int = attr.ib()
+    dtype: str = attr.ib()
+    count: int = attr.ib()
+    nodata: Optional[float] = attr.ib(default=None)
+    colormap: Optional[Dict] = attr.ib(default=None)
+    mtime: Optional[int] = attr.ib(default=None)
+    size: Optional[int] = attr.ib(default=None)
+
+    @classmethod
+    def from_reader(cls, src_dst: Any) -> "Footprint":
+        """Create footprint from an opened reader."""
+        mtime, size = get_file_version(src_dst.input)
+        return cls(
+            bounds=src_dst.get_geographic_bounds(WGS84_CRS),
+            minzoom=src_dst.minzoom,
+            maxzoom=src_dst.maxzoom,
+            dtype=src_dst.dataset.dtypes[0],
+            count=src_dst.dataset.count,
+            nodata=src_dst.dataset.nodata,
+            colormap=src_dst.colormap or None,
+            mtime=mtime,
+            size=size,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Footprint":
+        """Create footprint from a manifest entry."""
+        data = dict(data)
+        if data.get("colormap"):
+            # JSON object keys are strings
+            data["colormap"] = {
+                int(key): tuple(value) for key, value in data["colormap"].items()
+            }
+
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        """Return manifest entry."""
+        return attr.asdict(self)
+
+    def is_stale(self, path: str) -> bool:
+        """Check if the dataset file changed since the footprint was created."""
+        mtime, size = get_file_version(path)
+        if mtime is None:
+            # Non-local file, we can't check
+            return False
+
+        return (mtime, size) != (self.mtime, self.size)
+
+
+def scan(
+    paths: Sequence[str],
+    opener: Callable[[str], Any],
+    threads: int = 0,
+) -> Dict[str, Footprint]:
+    """Create the footprints of datasets (in parallel with `threads > 1`)."""
+
+    def _footprint(path: str) -> Footprint:
+        with opener(path) as src_dst:
+            return Footprint.from_reader(src_dst)
+
+    if threads > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return dict(zip(paths, executor.map(in_env(_footprint), paths)))
+
+    return {path: _footprint(path) for path in paths}
+
+
+def read_manifest(path: str) -> Dict:
+    """Read manifest file."""
+    with open(path) as f:
+        manifest = json.load(f)
+
+    manifest["datasets"] = {
+        name: Footprint.from_dict(entry)
+        for name, entry in manifest.get("datasets", {}).items()
+    }
+    if manifest.get("overview"):
+        manifest["overview"] = {
+            "path": manifest["overview"]["path"],
+            "footprint": Footprint.from_dict(manifest["overview"]["footprint"]),
+        }
+
+    return manifest
+
+
+def write_manifest(
+    path: str,
+    tms: str,
+    footprints: Dict[str, Footprint],
+    overview: Optional[Dict] = None,
+):
+    """Write manifest file (atomically).
+
+    `overview` is the mosaic overview entry (`{"path": ..., "footprint": ...}`).
+
+    """
+    manifest: Dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "tms": tms,
+        "datasets": {name: fp.to_dict() for name, fp in footprints.items()},
+    }
+    if overview:
+        manifest["overview"] = {
+            "path": overview["path"],
+            "footprint": overview["footprint"].to_dict(),
+        }
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", dir=dirname, suffix=".json", delete=False) as f:
+        json.dump(manifest, f)
+
+    os.replace(f.name, path)
+
+
+def load_manifest(
+    path: str,
+    paths: Sequence[str],
+    opener: Callable[[str], Any],
+    tms: str,
+    threads: int = 0,
+) -> Dict:
+    """Return the manifest of the datasets, creating or updating the manifest file.
+
+    Entries missing from the manifest, or for files modified since it was created,
+    are (re)created in parallel and the manifest is updated. The mosaic overview
+    entry is removed when datasets changed because the overview is outdated.
+
+    """
+    manifest: Dict[str, Any] = {"datasets": {}}
+    if os.path.exists(path):
+        manifest = read_manifest(path)
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("tms") != tms:
+            manifest = {"datasets": {}}
+
+    footprints = manifest["datasets"]
+    overview = manifest.get("overview")
+
+    stale = [
+        name
+        for name in paths
+        if name not in footprints or footprints[name].is_stale(name)
+    ]
+    if stale:
+        if overview:
+            warnings.warn(
+                f"Datasets changed, removing outdated overview {overview['path']} from manifest {path}"
+            )
+            overview = None
+
+        footprints = {**footprints, **scan(stale, opener, threads=threads)}
+        try:
+            write_manifest(path, tms, {name: footprints[name] for name in paths})
+        except OSError as e:
+            warnings.warn(f"Could not update manifest {path}: {e}")
+
+    return {
+        "version": MANIFEST_VERSION,
+        "tms": tms,
+        "datasets": {name: footprints[name] for name in paths},
+        "overview": overview,
+    }
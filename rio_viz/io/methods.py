@@ -0,0 +1,283 @@
+"""rio-viz streaming mosaic pixel selection methods.
+
+rio-tiler's `mean`, `median`, `stdev` and `count` methods stack every array
+before reducing them. The methods below are updated as each dataset array
+arrives so memory doesn't grow with the number of overlapping datasets.
+
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional, Union
+
+import numpy
+from rio_tiler.mosaic.methods.base import MosaicMethodBase
+from rio_tiler.mosaic.methods.defaults import (
+    FirstMethod,
+    HighestMethod,
+    LastBandHighMethod,
+    LastBandLowMethod,
+    LowestMethod,
+)
+
+
+@dataclass
+class StreamingMeanMethod(MosaicMethodBase):
+    """Return the mean pixel value, using running sum and count arrays."""
+
+    enforce_data_type: bool = True
+    _sum: Optional[numpy.ndarray] = field(default=None, init=False)
+    _count: Optional[numpy.ndarray] = field(default=None, init=False)
+    _dtype: Optional[numpy.dtype] = field(default=None, init=False)
+
+    def __repr__(self):
+        """Mosaic Method repr."""
+        return "<Mosaic: StreamingMeanMethod>"
+
+    @property
+    def data(self) -> Optional[numpy.ma.MaskedArray]:
+        """Return mean of the arrays."""
+        if self._sum is None:
+            return None
+
+        empty = self._count == 0
+        array = numpy.ma.MaskedArray(
+            self._sum / numpy.where(empty, 1, self._count), mask=empty
+        )
+
+        if self.enforce_data_type:
+            array = array.astype(self._dtype)
+
+        return array
+
+    def feed(self, array: numpy.ma.MaskedArray):
+        """Add array to the running sum."""
+        valid = ~numpy.ma.getmaskarray(array)
+        if self._sum is None:
+            self._dtype = array.dtype
+            self._sum = numpy.zeros(array.shape, dtype="float64")
+            self._count = numpy.zeros(array.shape, dtype="uint32")
+
+        self._sum += numpy.where(valid, array.data, 0)
+        self._count += valid
+
+
+@dataclass
+class StreamingStdevMethod(StreamingMeanMethod):
+    """Return the pixel values standard deviation, using running sums."""
+
+    enforce_data_type: bool = False
+    _sumsq: Optional[numpy.ndarray] = field(default=None, init=False)
+
+    def __repr__(self):
+        """Mosaic Method repr."""
+        return "<Mosaic: StreamingStdevMethod>"
+
+    @property
+    def data(self) -> Optional[numpy.ma.MaskedArray]:
+        """Return standard deviation of the arrays."""
+        if self._sum is None:
+            return None
+
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            mean = self._sum / self._count
+            variance = numpy.maximum(self._sumsq / self._count - mean**2, 0)
+
+        return numpy.ma.MaskedArray(numpy.sqrt(variance), mask=self._count == 0)
+
+    def feed(self, array: numpy.ma.MaskedArray):
+        """Add array to the running sums."""
+        super().feed(array)
+        if self._sumsq is None:
+            self._sumsq = numpy.zeros(array.shape, dtype="float64")
+
+        values = numpy.where(~numpy.ma.getmaskarray(array), array.data, 0)
+        self._sumsq += numpy.square(values, dtype="float64")
+
+
+@dataclass
+class StreamingCountMethod(MosaicMethodBase):
+    """Return the valid pixels count, using a running count array."""
+
+    _count: Optional[numpy.ndarray] = field(default=None, init=False)
+    _fed: int = field(default=0, init=False)
+
+    def __repr__(self):
+        """Mosaic Method repr."""
+        return "<Mosaic: StreamingCountMethod>"
+
+    @property
+    def data(self) -> Optional[numpy.ma.MaskedArray]:
+        """Return valid pixels count (of the first band)."""
+        if self._count is None:
+            return None
+
+        data = self._count
+        # only need unint8 for small mosaic stacks
+        if self._fed < 256:
+            data = data.astype(numpy.uint8)
+
+        return numpy.ma.MaskedArray(data, mask=numpy.zeros(data.shape, dtype=bool))
+
+    def feed(self, array: numpy.ma.MaskedArray):
+        """Add array valid pixels to the count."""
+        valid = ~numpy.ma.getmaskarray(array)
+        # only need the counts from one band
+        if valid.ndim > 2:
+            valid = valid[0]
+
+        if self._count is None:
+            self._count = numpy.zeros(valid.shape, dtype="uint32")
+
+        self._count += valid
+        self._fed += 1
+
+
+@dataclass
+class StreamingMedianMethod(MosaicMethodBase):
+    """Return the median pixel value, using a bounded-depth remedian.
+
+    The arrays of the first `exact` datasets are kept, so the median is exact for
+    up to `exact` overlapping datasets. Past that, values are buffered by groups
+    of `depth` (per pixel). When a group is full it is replaced by its median, in
+    the group of the next level, so the median is approximate and memory is
+    `depth * ceil(log(n, depth))` arrays for `n` datasets.
+
+    """
+
+    depth: int = 9
+    exact: int = 64
+    enforce_data_type: bool = True
+    _stack: Optional[List[numpy.ma.MaskedArray]] = field(default_factory=list, init=False)
+    _levels: List[numpy.ndarray] = field(default_factory=list, init=False)
+    _fill: List[numpy.ndarray] = field(default_factory=list, init=False)
+    _dtype: Optional[numpy.dtype] = field(default=None, init=False)
+
+    def __post_init__(self):
+        """Check depth."""
+        if self.depth < 2:
+            raise ValueError("Median depth must be greater than 1.")
+
+    def __repr__(self):
+        """Mosaic Method repr."""
+        return "<Mosaic: StreamingMedianMethod>"
+
+    def _push(self, level: int, values: numpy.ndarray, valid: numpy.ndarray):
+        """Add the valid values to a level."""
+        if level == len(self._levels):
+            self._levels.append(numpy.zeros((self.depth, *values.shape), dtype="float64"))
+            self._fill.append(numpy.zeros(values.shape, dtype="int64"))
+
+        buffer = self._levels[level]
+        fill = self._fill[level]
+
+        idx = numpy.nonzero(valid)
+        buffer[(fill[idx], *idx)] = values[idx]
+        fill[idx] += 1
+
+        full = fill == self.depth
+        if full.any():
+            medians = numpy.zeros(values.shape, dtype="float64")
+            medians[full] = numpy.median(buffer[:, full], axis=0)
+            fill[full] = 0
+            self._push(level + 1, medians, full)
+
+    @property
+    def data(self) -> Optional[numpy.ma.MaskedArray]:
+        """Return the (weighted) median of the buffered values."""
+        if self._stack:
+            array = numpy.ma.median(numpy.ma.stack(self._stack), axis=0)
+            if self.enforce_data_type:
+                array = array.astype(self._dtype)
+
+            return array
+
+        if not self._levels:
+            return None
+
+        values = numpy.concatenate(self._levels, axis=0)
+        weights = numpy.concatenate(
+            [
+                numpy.where(
+                    numpy.arange(self.depth).reshape(-1, *[1] * fill.ndim) < fill,
+                    self.depth**level,
+                    0,
+                )
+                for level, fill in enumerate(self._fill)
+            ],
+            axis=0,
+        )
+
+        # Sort values (ignoring the empty entries) and find the middle weight
+        order = numpy.argsort(numpy.where(weights > 0, values, numpy.inf), axis=0)
+        values = numpy.take_along_axis(values, order, axis=0)
+        cumulative = numpy.cumsum(numpy.take_along_axis(weights, order, axis=0), axis=0)
+        total = cumulative[-1]
+
+        low = numpy.argmax(cumulative >= total / 2, axis=0)[None]
+        high = numpy.argmax(cumulative > total / 2, axis=0)[None]
+        median = (
+            numpy.take_along_axis(values, low, axis=0)[0]
+            + numpy.take_along_axis(values, high, axis=0)[0]
+        ) / 2
+
+        array = numpy.ma.MaskedArray(median, mask=total == 0)
+        if self.enforce_data_type:
+            array = array.astype(self._dtype)
+
+        return array
+
+    def feed(self, array: numpy.ma.MaskedArray):
+        """Add array to the buffers."""
+        if self._dtype is None:
+            self._dtype = array.dtype
+
+        arrays = [array]
+        if self._stack is not None:
+            self._stack.append(array)
+            if len(self._stack) <= self.exact:
+                return
+
+            # Too many datasets, switch to the remedian
+            arrays, self._stack = self._stack, None
+
+        for array in arrays:
+            self._push(0, array.data, ~numpy.ma.getmaskarray(array))
+
+
+class PixelSelectionMethod(str, Enum):
+    """Mosaic pixel selection methods."""
+
+    first = "first"
+    highest = "highest"
+    lowest = "lowest"
+    mean = "mean"
+    median = "median"
+    stdev = "stdev"
+    count = "count"
+    lastbandlow = "lastbandlow"
+    lastbandhigh = "lastbandhigh"
+
+
+def get_pixel_selection(
+    method: Union[str, MosaicMethodBase, None] = None,
+    median_depth: int = 9,
+) -> MosaicMethodBase:
+    """Return a new pixel selection method instance from its name."""
+    if isinstance(method, MosaicMethodBase):
+        return method
+
+    name = PixelSelectionMethod(method or "first")
+    if name == PixelSelectionMethod.median:
+        return StreamingMedianMethod(depth=median_depth)
+
+    return {
+        PixelSelectionMethod.first: FirstMethod,
+        PixelSelectionMethod.highest: HighestMethod,
+        PixelSelectionMethod.lowest: LowestMethod,
+        PixelSelectionMethod.mean: StreamingMeanMethod,
+        PixelSelectionMethod.stdev: StreamingStdevMethod,
+        PixelSelectionMethod.count: StreamingCountMethod,
+        PixelSelectionMethod.lastbandlow: LastBandLowMethod,
+        PixelSelectionMethod.lastbandhigh: LastBandHighMethod,
+    }[name]()
@@ -1,22 +1,212 @@
 """rio-viz mosaic reader."""
 
-from typing import Any, Dict, Type
+import os
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 import attr
+import numpy
+import rasterio
 from braceexpand import braceexpand
-from morecantile import TileMatrixSet
-from rio_tiler.constants import WEB_MERCATOR_TMS, WGS84_CRS
+from morecantile import Tile, TileMatrixSet
+from rasterio.crs import CRS
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.features import bounds as featureBounds
+from rasterio.features import rasterize
+from rasterio.transform import from_bounds
+from rasterio.warp import transform, transform_bounds, transform_geom
+from rasterio.windows import Window
+from rio_cogeo.cogeo import cog_translate
+from rio_cogeo.profiles import cog_profiles
+from rio_tiler.constants import MAX_THREADS, WEB_MERCATOR_TMS, WGS84_CRS
+from rio_tiler.errors import EmptyMosaicError, TileOutsideBounds
 from rio_tiler.io import BaseReader, COGReader
 from rio_tiler.models import BandStatistics, ImageData, Info, PointData
 from rio_tiler.mosaic import mosaic_point_reader, mosaic_reader
+from rio_tiler.mosaic.methods.base import MosaicMethodBase
+from rio_tiler.tasks import create_tasks, filter_tasks
+from rio_tiler.types import BBox
+from rio_tiler.utils import _validate_shape_input
+
+from rio_viz.cache import LRUCache
+from rio_viz.env import in_env
+from rio_viz.io import statistics as mosaic_statistics
+from rio_viz.io.index import STRTree
+from rio_viz.io.manifest import Footprint, load_manifest, scan
+from rio_viz.io.methods import get_pixel_selection
+from rio_viz.io.points import read_points
+from rio_viz.metrics import FilesCounter
+from rio_viz.pool import open_reader
+
+
+@attr.s
+class DatasetCache:
+    """Thread-safe LRU cache of opened datasets.
+
+    Least recently used datasets are closed when more than `maxsize` are opened,
+    unless they are being read, in which case they are closed when released.
+
+    Args:
+        opener (callable): Function returning an opened reader for a path.
+        maxsize (int): Maximum number of opened datasets. Defaults to `64`.
+
+    """
+
+    opener: Callable[[str], Any] = attr.ib()
+    maxsize: int = attr.ib(default=64)
+
+    _handles: "OrderedDict[str, Any]" = attr.ib(init=False, factory=OrderedDict)
+    # number of leases by reader (`id`)
+    _leases: Dict[int, int] = attr.ib(init=False, factory=dict)
+    # evicted readers to close when released
+    _evicted: Set[int] = attr.ib(init=False, factory=set)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def _lease(self, src_dst: Any):
+        """Add a lease (lock must be held)."""
+        self._leases[id(src_dst)] = self._leases.get(id(src_dst), 0) + 1
+
+    def _evict(self) -> List[Any]:
+        """Remove least recently used datasets (lock must be held)."""
+        closing = []
+        while len(self._handles) > self.maxsize:
+            _, src_dst = self._handles.popitem(last=False)
+            if id(src_dst) in self._leases:
+                self._evicted.add(id(src_dst))
+            else:
+                closing.append(src_dst)
+
+        return closing
+
+    def acquire(self, path: str) -> Any:
+        """Lease the reader of `path`, opening the dataset if needed."""
+        with self._lock:
+            src_dst = self._handles.get(path)
+            if src_dst is not None:
+                self._handles.move_to_end(path)
+                self._lease(src_dst)
+                return src_dst
+
+        opened = self.opener(path)
+
+        with self._lock:
+            # Another thread might have opened the same dataset in the meantime
+            src_dst = self._handles.get(path)
+            if src_dst is None:
+                src_dst = self._handles[path] = opened
+                opened = None
+            else:
+                self._handles.move_to_end(path)
+
+            self._lease(src_dst)
+            closing = self._evict()
+
+        if opened is not None:
+            closing.append(opened)
+
+        for src in closing:
+            src.close()
+
+        return src_dst
+
+    def release(self, src_dst: Any):
+        """Release a leased reader."""
+        with self._lock:
+            leases = self._leases.pop(id(src_dst)) - 1
+            if leases:
+                self._leases[id(src_dst)] = leases
+                return
+
+            if id(src_dst) not in self._evicted:
+                return
+
+            self._evicted.discard(id(src_dst))
+
+        src_dst.close()
+
+    @contextmanager
+    def get(self, path: str) -> Iterator[Any]:
+        """Lease the reader of `path` for the duration of the context."""
+        src_dst = self.acquire(path)
+        try:
+            yield src_dst
+        finally:
+            self.release(src_dst)
+
+    def clear(self):
+        """Close all the datasets which are not being read."""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+            closing = []
+            for src_dst in handles:
+                if id(src_dst) in self._leases:
+                    self._evicted.add(id(src_dst))
+                else:
+                    closing.append(src_dst)
+
+        for src_dst in closing:
+            src_dst.close()
+
+    def __contains__(self, path: str) -> bool:
+        """Check if the dataset is opened."""
+        return path in self._handles
+
+    def __len__(self) -> int:
+        """Number of opened datasets."""
+        return len(self._handles)
+
+
+def _resolve(path: str, manifest: str) -> str:
+    """Resolve a path relative to the manifest directory."""
+    if "://" in path or os.path.isabs(path):
+        return path
+
+    return os.path.join(os.path.dirname(os.path.abspath(manifest)), path)
 
 
 @attr.s
 class MosaicReader(BaseReader):
     """Simple Mosaic reader.
 
+    Datasets are opened when first read and kept in a LRU cache of opened
+    datasets, only their footprints (bounds, zooms, ...) are kept for all of them.
+
     Args:
         input (str): Brace Expandable path (e.g: file{1,2,3}.tif).
+        threads (int): Number of threads used to read the intersecting datasets.
+            Defaults to `0` (datasets are read one after another).
+        max_open (int): Maximum number of opened datasets. Defaults to `64`.
+        manifest (str, optional): Path of a manifest file (see
+            `rio viz-mosaic manifest`) to get the datasets footprints from instead
+            of opening every dataset. Outdated entries are updated.
+        median_depth (int): Number of values per pixel buffered by the `median`
+            pixel selection method before they are reduced, once more than 64
+            datasets overlap (the median is then approximate). Defaults to `9`.
+        overview (str, optional): Path of a low resolution overview of the whole
+            mosaic (see `rio viz-mosaic overview`). Defaults to the overview
+            recorded in the manifest.
+        overview_maxzoom (int, optional): Tiles up to this zoom level are read from
+            the overview. Defaults to the overview maxzoom.
+
+    Datasets are skipped for the tiles below their minzoom, and above their maxzoom
+    (unless the tile zoom is greater than the mosaic maxzoom).
 
     """
 
@@ -25,44 +215,130 @@ class MosaicReader(BaseReader):
 
     reader: Type[COGReader] = attr.ib(default=COGReader)
 
+    # Can be set with `--reader-params threads=N`
+    threads: int = attr.ib(default=0, converter=int)
+    max_open: int = attr.ib(default=64, converter=int)
+    manifest: Optional[str] = attr.ib(default=None)
+    median_depth: int = attr.ib(default=9, converter=int)
+    overview: Optional[str] = attr.ib(default=None)
+    overview_maxzoom: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
+
     colormap: Dict = attr.ib(init=False)
 
-    datasets: Dict[str, Type[COGReader]] = attr.ib(init=False)
+    footprints: Dict[str, Footprint] = attr.ib(init=False)
+    handles: DatasetCache = attr.ib(init=False)
+    files_opened: FilesCounter = attr.ib(init=False, factory=FilesCounter)
+    overview_footprint: Optional[Footprint] = attr.ib(init=False, default=None)
+
+    # Spatial index of the datasets footprints (in WGS84)
+    index: STRTree = attr.ib(init=False)
+
+    # Mosaic statistics by options
+    _statistics: LRUCache = attr.ib(init=False, factory=lambda: LRUCache(maxsize=16))
 
     def __attrs_post_init__(self):
-        """Fetch Reference band to get the bounds."""
-        self.datasets = {
-            src_path: self.reader(src_path, tms=self.tms)
-            for src_path in braceexpand(self.input)
-        }
+        """Fetch the datasets footprints and build the spatial index."""
+        self.handles = DatasetCache(self._open, maxsize=self.max_open)
+
+        paths = list(braceexpand(self.input))
+        threads = self.threads or MAX_THREADS
+        if self.manifest:
+            manifest = load_manifest(
+                self.manifest, paths, self._open, self.tms.id, threads=threads
+            )
+            self.footprints = manifest["datasets"]
+            if not self.overview and manifest["overview"]:
+                self.overview = _resolve(manifest["overview"]["path"], self.manifest)
+                self.overview_footprint = manifest["overview"]["footprint"]
+        else:
+            self.footprints = scan(paths, self._open, threads=threads)
+
+        footprints = list(self.footprints.values())
+
+        self.minzoom = min([fp.minzoom for fp in footprints])
+        self.maxzoom = max([fp.maxzoom for fp in footprints])
 
-        self.minzoom = min([cog.minzoom for cog in self.datasets.values()])
-        self.maxzoom = max([cog.maxzoom for cog in self.datasets.values()])
+        if self.overview:
+            if self.overview_footprint is None:
+                self.overview_footprint = scan([self.overview], self._open)[self.overview]
+
+            if self.overview_maxzoom is None:
+                self.overview_maxzoom = self.overview_footprint.maxzoom
+
+            self.minzoom = min(self.minzoom, self.overview_footprint.minzoom)
 
         self.crs = WGS84_CRS
-        bounds = [cog.get_geographic_bounds(WGS84_CRS) for cog in self.datasets.values()]
-        minx, miny, maxx, maxy = zip(*bounds)
+        minx, miny, maxx, maxy = zip(*[fp.bounds for fp in footprints])
         self.bounds = [min(minx), min(miny), max(maxx), max(maxy)]
 
+        self.index = STRTree([fp.bounds for fp in footprints])
+
         # check for unique dtype
-        dtypes = {cog.dataset.dtypes[0] for cog in self.datasets.values()}
+        dtypes = {fp.dtype for fp in footprints}
         if len(dtypes) > 1:
             raise Exception("Datasets must be of the same data type.")
 
         # check for same number of band
-        nbands = {cog.dataset.count for cog in self.datasets.values()}
+        nbands = {fp.count for fp in footprints}
         if len(nbands) > 1:
             raise Exception("Datasets must be have the same number of bands.")
 
-        cmaps = [cog.colormap for cog in self.datasets.values() if cog.colormap]
+        cmaps = [fp.colormap for fp in footprints if fp.colormap]
         if len(cmaps) > 0:
             # !!! We take the first one ¡¡¡
             self.colormap = list(cmaps)[0]
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Support using with Context Managers."""
-        for dataset in self.datasets.values():
-            dataset.close()
+        self.handles.clear()
+
+    def _open(self, src_path: str) -> COGReader:
+        """Open a dataset."""
+        src_dst = open_reader(self.reader, src_path, tms=self.tms)
+        self.files_opened.add()
+        return src_dst
+
+    def _intersects(self, bbox) -> List[str]:
+        """Return the datasets intersecting a bbox (in WGS84)."""
+        names = list(self.footprints)
+        return [names[ix] for ix in self.index.query(bbox)]
+
+    def _tile_bounds(self, x: int, y: int, z: int) -> BBox:
+        """Return the bounds of a tile (in WGS84)."""
+        bbox = self.tms.bounds(Tile(x, y, z))
+        geographic_crs = self.tms.rasterio_geographic_crs
+        if geographic_crs != WGS84_CRS:
+            bbox = transform_bounds(geographic_crs, WGS84_CRS, *bbox, densify_pts=21)
+
+        return bbox
+
+    def _in_zoom_range(self, footprint: Footprint, zoom: int) -> bool:
+        """Check if a dataset should be read for a zoom level."""
+        if zoom < footprint.minzoom:
+            return False
+
+        # Keep all the datasets when over-zooming past the mosaic maxzoom
+        return zoom <= footprint.maxzoom or zoom > self.maxzoom
+
+    def assets_for_tile(self, x: int, y: int, z: int) -> List[str]:
+        """Return the datasets intersecting a tile (within their zoom range)."""
+        return [
+            name
+            for name in self._intersects(self._tile_bounds(x, y, z))
+            if self._in_zoom_range(self.footprints[name], z)
+        ]
+
+    def assets_for_point(
+        self, lon: float, lat: float, coord_crs: CRS = WGS84_CRS
+    ) -> List[str]:
+        """Return the datasets intersecting a point."""
+        if coord_crs != WGS84_CRS:
+            xs, ys = transform(coord_crs, WGS84_CRS, [lon], [lat])
+            lon, lat = xs[0], ys[0]
+
+        return self._intersects((lon, lat, lon, lat))
 
     def tile(
         self,
@@ -70,20 +346,92 @@ class MosaicReader(BaseReader):
         tile_y: int,
         tile_z: int,
         reverse: bool = False,
+        pixel_selection: Union[str, MosaicMethodBase, None] = None,
         **kwargs: Any,
     ) -> ImageData:
-        """Get Tile."""
-        mosaic_assets = (
-            list(reversed(list(self.datasets))) if reverse else list(self.datasets)
+        """Get Tile.
+
+        `pixel_selection` is a `rio_viz.io.methods.PixelSelectionMethod` name (or
+        a method instance), defaults to `first`. Tiles up to `overview_maxzoom` are
+        read from the mosaic overview (`reverse` and `pixel_selection` are ignored).
+
+        """
+        if self.overview and tile_z <= self.overview_maxzoom:
+            return self._overview_tile(tile_x, tile_y, tile_z, **kwargs)
+
+        return self._mosaic_tile(
+            tile_x,
+            tile_y,
+            tile_z,
+            reverse=reverse,
+            pixel_selection=pixel_selection,
+            **kwargs,
         )
 
+    def _in_overview(self, tile_x: int, tile_y: int, tile_z: int) -> bool:
+        """Check if a tile intersects the mosaic overview."""
+        minx, miny, maxx, maxy = self._tile_bounds(tile_x, tile_y, tile_z)
+        ominx, ominy, omaxx, omaxy = self.overview_footprint.bounds
+        return not (minx > omaxx or maxx < ominx or miny > omaxy or maxy < ominy)
+
+    def tile_exists(self, tile_x: int, tile_y: int, tile_z: int) -> bool:
+        """Check if a tile intersects a dataset footprint (or the overview).
+
+        Only the spatial index is used, no dataset is opened.
+
+        """
+        if self.overview and tile_z <= self.overview_maxzoom:
+            return self._in_overview(tile_x, tile_y, tile_z)
+
+        return bool(self.assets_for_tile(tile_x, tile_y, tile_z))
+
+    def _overview_tile(
+        self, tile_x: int, tile_y: int, tile_z: int, **kwargs: Any
+    ) -> ImageData:
+        """Read a tile from the mosaic overview."""
+        if not self._in_overview(tile_x, tile_y, tile_z):
+            raise EmptyMosaicError("Method returned an empty array")
+
+        with self.handles.get(self.overview) as cog:
+            return cog.tile(tile_x, tile_y, tile_z, **kwargs)
+
+    def _mosaic_tile(
+        self,
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        reverse: bool = False,
+        pixel_selection: Union[str, MosaicMethodBase, None] = None,
+        mosaic_assets: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> ImageData:
+        """Read a tile from the intersecting datasets (or from `mosaic_assets`)."""
+        if mosaic_assets is None:
+            mosaic_assets = self.assets_for_tile(tile_x, tile_y, tile_z)
+
+        if not mosaic_assets:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        if reverse:
+            mosaic_assets = list(reversed(mosaic_assets))
+
         def _reader(
             asset: str, tile_x: int, tile_y: int, tile_z: int, **kwargs: Any
         ) -> ImageData:
-            return self.datasets[asset].tile(tile_x, tile_y, tile_z, **kwargs)
+            with self.handles.get(asset) as cog:
+                return cog.tile(tile_x, tile_y, tile_z, **kwargs)
 
+        # With `threads > 1`, datasets are read in chunks of `threads` so we can
+        # stop as soon as the pixel selection method is done (e.g the tile is full)
         return mosaic_reader(
-            mosaic_assets, _reader, tile_x, tile_y, tile_z, threads=0, **kwargs
+            mosaic_assets,
+            in_env(_reader),
+            tile_x,
+            tile_y,
+            tile_z,
+            threads=self.threads,
+            pixel_selection=get_pixel_selection(pixel_selection, self.median_depth),
+            **kwargs,
         )[0]
 
     def point(
@@ -91,29 +439,109 @@ class MosaicReader(BaseReader):
         lon: float,
         lat: float,
         reverse: bool = False,
+        pixel_selection: Union[str, MosaicMethodBase, None] = None,
         **kwargs: Any,
     ) -> PointData:
         """Get Point value."""
-        mosaic_assets = (
-            list(reversed(list(self.datasets))) if reverse else list(self.datasets)
+        mosaic_assets = self.assets_for_point(
+            lon, lat, coord_crs=kwargs.get("coord_crs") or WGS84_CRS
         )
+        if not mosaic_assets:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        if reverse:
+            mosaic_assets = list(reversed(mosaic_assets))
 
         def _reader(asset: str, lon: float, lat: float, **kwargs) -> PointData:
-            return self.datasets[asset].point(lon, lat, **kwargs)
+            with self.handles.get(asset) as cog:
+                return cog.point(lon, lat, **kwargs)
 
-        return mosaic_point_reader(mosaic_assets, _reader, lon, lat, threads=0, **kwargs)[
-            0
-        ]
+        return mosaic_point_reader(
+            mosaic_assets,
+            in_env(_reader),
+            lon,
+            lat,
+            threads=self.threads,
+            pixel_selection=get_pixel_selection(pixel_selection, self.median_depth),
+            **kwargs,
+        )[0]
+
+    def points(
+        self,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        coord_crs: CRS = WGS84_CRS,
+        reverse: bool = False,
+        pixel_selection: Union[str, MosaicMethodBase, None] = None,
+        **kwargs: Any,
+    ) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+        """Get the values of many points.
+
+        Points are grouped by intersecting dataset, so each dataset is opened once,
+        and read by internal block (see `rio_viz.io.points.read_points`).
+
+        Returns:
+            tuple: Masked array of shape (bands, points) and band names.
+
+        """
+        xs = numpy.asarray(xs, dtype="float64")
+        ys = numpy.asarray(ys, dtype="float64")
+
+        lons, lats = xs, ys
+        if len(xs) and coord_crs != WGS84_CRS:
+            lons, lats = transform(coord_crs, WGS84_CRS, xs, ys)
+
+        groups: Dict[str, List[int]] = {}
+        for ix, (lon, lat) in enumerate(zip(lons, lats)):
+            for name in self._intersects((lon, lat, lon, lat)):
+                groups.setdefault(name, []).append(ix)
+
+        if not groups:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        mosaic_assets = [name for name in self.footprints if name in groups]
+        if reverse:
+            mosaic_assets = list(reversed(mosaic_assets))
+
+        def _reader(asset: str) -> Tuple:
+            selected = groups[asset]
+            with self.handles.get(asset) as cog:
+                values, band_names = read_points(
+                    cog, xs[selected], ys[selected], coord_crs=coord_crs, **kwargs
+                )
+
+            return selected, values, band_names
+
+        pixel_selection = get_pixel_selection(pixel_selection, self.median_depth)
+        tasks = create_tasks(in_env(_reader), mosaic_assets, self.threads)
+
+        names: List[str] = []
+        for (selected, values, band_names), _ in filter_tasks(tasks):
+            names = names or band_names
+            # Points are fed as (bands, 1, points) images
+            array = numpy.ma.masked_all((values.shape[0], 1, len(xs)), values.dtype)
+            array[:, 0, selected] = values
+            pixel_selection.feed(array)
+            if pixel_selection.is_done:
+                break
+
+        data = pixel_selection.data
+        if data is None:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        data = data.reshape(-1, len(xs))
+        if len(data) != len(names):
+            names = [f"b{ix + 1}" for ix in range(len(data))]
+
+        return data, names
 
     def info(self) -> Info:
         """info."""
         # !!! We return info from the first dataset
         # Most of the info should be similar in other files ¡¡¡
-        item = list(self.datasets)[0]
-        info_metadata = (
-            self.datasets[item]
-            .info()
-            .model_dump(
+        item = list(self.footprints)[0]
+        with self.handles.get(item) as cog:
+            info_metadata = cog.info().model_dump(
                 exclude={
                     "bounds",
                     "minzoom",
@@ -123,29 +551,305 @@ class MosaicReader(BaseReader):
                     "overviews",
                 },
             )
-        )
+
         info_metadata["bounds"] = self.bounds
         info_metadata["minzoom"] = self.minzoom
         info_metadata["maxzoom"] = self.maxzoom
         return Info(**info_metadata)
 
-    def statistics(self, **kwargs: Any) -> Dict[str, BandStatistics]:
-        """Return Dataset's statistics."""
-        # FOR NOW WE ONLY RETURN VALUE FROM THE FIRST FILE
-        item = list(self.datasets)[0]
-        return self.datasets[item].statistics(**kwargs)
-
-    ############################################################################
-    # Not Implemented methods
-    # BaseReader required those method to be implemented
-    def preview(self, *args, **kwargs):
-        """Placeholder for BaseReader.preview."""
-        raise NotImplementedError
-
-    def part(self, *args, **kwargs):
-        """Placeholder for BaseReader.part."""
-        raise NotImplementedError
-
-    def feature(self, *args, **kwargs):
-        """Placeholder for BaseReader.feature."""
-        raise NotImplementedError
+    def statistics(
+        self,
+        categorical: bool = False,
+        categories: Optional[List[float]] = None,
+        percentiles: Optional[List[int]] = None,
+        hist_options: Optional[Dict] = None,
+        max_size: int = 1024,
+        **kwargs: Any,
+    ) -> Dict[str, BandStatistics]:
+        """Return mosaic statistics.
+
+        Each dataset is read at low resolution (`max_size`, using its overviews)
+        in parallel, and the per-band summaries are merged as they arrive, so
+        percentiles and histograms are approximate for continuous data (see
+        `rio_viz.io.statistics`). Results are cached.
+
+        """
+        key = repr(
+            (
+                categorical,
+                categories,
+                percentiles,
+                sorted((hist_options or {}).items()),
+                max_size,
+                sorted(kwargs.items()),
+            )
+        )
+        if (stats := self._statistics.get(key)) is not None:
+            return stats
+
+        def _summary(asset: str) -> Sequence:
+            with self.handles.get(asset) as cog:
+                img = cog.preview(max_size=max_size, **kwargs)
+
+            return img.band_names, mosaic_statistics.summarize(img.array)
+
+        threads = self.threads or MAX_THREADS
+        tasks = create_tasks(in_env(_summary), list(self.footprints), threads)
+
+        band_names: List[str] = []
+        summaries = None
+        for (names, summary), _ in filter_tasks(tasks):
+            band_names = band_names or names
+            summaries = mosaic_statistics.merge(summaries, summary)
+
+        if summaries is None:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        stats = {
+            band_name: BandStatistics(
+                **mosaic_statistics.get_statistics(
+                    summary,
+                    categorical=categorical,
+                    categories=categories,
+                    percentiles=percentiles,
+                    **(hist_options or {}),
+                )
+            )
+            for band_name, summary in zip(band_names, summaries)
+        }
+        self._statistics.set(key, stats, 1)
+        return stats
+
+    def _output_size(
+        self,
+        bbox: BBox,
+        max_size: Optional[int] = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        """Return output width and height for bounds (respecting X/Y aspect ratio)."""
+        if width and height:
+            return width, height
+
+        ratio = (bbox[2] - bbox[0]) / (bbox[3] - bbox[1])
+        if width:
+            return width, max(1, round(width / ratio))
+
+        if height:
+            return max(1, round(height * ratio)), height
+
+        max_size = max_size or 1024
+        if ratio >= 1:
+            return max_size, max(1, round(max_size / ratio))
+
+        return max(1, round(max_size * ratio)), max_size
+
+    def part(
+        self,
+        bbox: BBox,
+        dst_crs: Optional[CRS] = None,
+        bounds_crs: CRS = WGS84_CRS,
+        max_size: Optional[int] = None,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+        reverse: bool = False,
+        pixel_selection: Union[str, MosaicMethodBase, None] = None,
+        **kwargs: Any,
+    ) -> ImageData:
+        """Read part of the mosaic.
+
+        Only the datasets intersecting the bounds are read, all at the same output
+        size (which lets GDAL use the matching overview level). Without `width`
+        and `height` the output size is defined by `max_size` (defaults to 1024).
+
+        """
+        dst_crs = dst_crs or bounds_crs
+
+        bbox_wgs84 = bbox
+        if bounds_crs != WGS84_CRS:
+            bbox_wgs84 = transform_bounds(bounds_crs, WGS84_CRS, *bbox, densify_pts=21)
+
+        mosaic_assets = self._intersects(bbox_wgs84)
+        if not mosaic_assets:
+            raise EmptyMosaicError("Method returned an empty array")
+
+        if reverse:
+            mosaic_assets = list(reversed(mosaic_assets))
+
+        bbox_dst = bbox
+        if bounds_crs != dst_crs:
+            bbox_dst = transform_bounds(bounds_crs, dst_crs, *bbox, densify_pts=21)
+
+        width, height = self._output_size(
+            bbox_dst, max_size=max_size, height=height, width=width
+        )
+
+        def _reader(asset: str, bbox: BBox, **kwargs: Any) -> ImageData:
+            with self.handles.get(asset) as cog:
+                return cog.part(bbox, **kwargs)
+
+        return mosaic_reader(
+            mosaic_assets,
+            in_env(_reader),
+            bbox,
+            dst_crs=dst_crs,
+            bounds_crs=bounds_crs,
+            height=height,
+            width=width,
+            threads=self.threads,
+            pixel_selection=get_pixel_selection(pixel_selection, self.median_depth),
+            **kwargs,
+        )[0]
+
+    def preview(
+        self,
+        max_size: int = 1024,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+        **kwargs: Any,
+    ) -> ImageData:
+        """Return a preview of the mosaic (in WGS84)."""
+        return self.part(
+            self.bounds,
+            dst_crs=WGS84_CRS,
+            bounds_crs=WGS84_CRS,
+            max_size=max_size,
+            height=height,
+            width=width,
+            **kwargs,
+        )
+
+    def feature(
+        self,
+        shape: Dict,
+        dst_crs: Optional[CRS] = None,
+        shape_crs: CRS = WGS84_CRS,
+        **kwargs: Any,
+    ) -> ImageData:
+        """Read part of the mosaic defined by a geojson feature."""
+        shape = _validate_shape_input(shape)
+        dst_crs = dst_crs or shape_crs
+
+        img = self.part(
+            featureBounds(shape), dst_crs=dst_crs, bounds_crs=shape_crs, **kwargs
+        )
+
+        if dst_crs != shape_crs:
+            shape = transform_geom(shape_crs, dst_crs, shape)
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore",
+                category=NotGeoreferencedWarning,
+                module="rasterio",
+            )
+            cutline_mask = rasterize(
+                [shape],
+                out_shape=(img.height, img.width),
+                transform=img.transform,
+                all_touched=True,
+                default_value=0,
+                fill=1,
+                dtype="uint8",
+            ).astype("bool")
+
+        img.cutline_mask = cutline_mask
+        img.array.mask = numpy.where(~cutline_mask, img.array.mask, True)
+
+        return img
+
+    def write_overview(
+        self,
+        path: str,
+        zoom: int,
+        tilesize: int = 256,
+        **kwargs: Any,
+    ) -> Footprint:
+        """Write a low resolution overview of the whole mosaic, as a COG.
+
+        The overview is aligned with the tiles of `zoom` and written tile by tile
+        (memory is bounded by the tile size). `kwargs` are forwarded to the tile
+        reads (e.g `pixel_selection`).
+
+        """
+        minx, miny, maxx, maxy = self.bounds
+        tiles = list(self.tms.tiles(minx, miny, maxx, maxy, [zoom]))
+        xmin = min(t.x for t in tiles)
+        ymin = min(t.y for t in tiles)
+        xmax = max(t.x for t in tiles)
+        ymax = max(t.y for t in tiles)
+
+        ul = self.tms.xy_bounds(Tile(xmin, ymin, zoom))
+        lr = self.tms.xy_bounds(Tile(xmax, ymax, zoom))
+        width = (xmax - xmin + 1) * tilesize
+        height = (ymax - ymin + 1) * tilesize
+        profile = {
+            "driver": "GTiff",
+            "width": width,
+            "height": height,
+            "crs": self.tms.rasterio_crs,
+            "transform": from_bounds(ul.left, lr.bottom, lr.right, ul.top, width, height),
+            "tiled": True,
+            "blockxsize": tilesize,
+            "blockysize": tilesize,
+        }
+
+        dirname = os.path.dirname(os.path.abspath(path))
+        with tempfile.TemporaryDirectory(dir=dirname) as tmpdir:
+            tmp_path = os.path.join(tmpdir, "overview.tif")
+
+            dst = None
+            with rasterio.Env(GDAL_TIFF_INTERNAL_MASK=True):
+                try:
+                    for t in tiles:
+                        try:
+                            # Datasets are read whatever their zoom range
+                            img = self._mosaic_tile(
+                                t.x,
+                                t.y,
+                                zoom,
+                                tilesize=tilesize,
+                                mosaic_assets=self._intersects(
+                                    self._tile_bounds(t.x, t.y, zoom)
+                                ),
+                                **kwargs,
+                            )
+                        except (EmptyMosaicError, TileOutsideBounds):
+                            continue
+
+                        if dst is None:
+                            dst = rasterio.open(
+                                tmp_path,
+                                "w",
+                                count=img.count,
+                                dtype=img.data.dtype,
+                                **profile,
+                            )
+
+                        window = Window(
+                            (t.x - xmin) * tilesize,
+                            (t.y - ymin) * tilesize,
+                            tilesize,
+                            tilesize,
+                        )
+                        dst.write(img.data, window=window)
+                        dst.write_mask(img.mask, window=window)
+
+                finally:
+                    if dst is not None:
+                        dst.close()
+
+                if dst is None:
+                    raise EmptyMosaicError("Method returned an empty array")
+
+            output_profile = cog_profiles.get("deflate")
+            output_profile.update({"blockxsize": tilesize, "blockysize": tilesize})
+            cog_translate(
+                tmp_path,
+                path,
+                output_profile,
+                config={"GDAL_TIFF_INTERNAL_MASK": True},
+                quiet=True,
+            )
+
+        return scan([path], self._open)[path]
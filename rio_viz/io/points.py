@@ -0,0 +1,165 @@
+"""rio-viz batched point reads."""
+
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy
+from rasterio.crs import CRS
+from rasterio.warp import transform
+from rasterio.windows import Window
+from rio_tiler.constants import WGS84_CRS
+from rio_tiler.errors import EmptyMosaicError, PointOutsideBounds
+from rio_tiler.expression import parse_expression
+from rio_tiler.models import ImageData
+
+
+def read_points(
+    src_dst: Any,
+    xs: Sequence[float],
+    ys: Sequence[float],
+    coord_crs: CRS = WGS84_CRS,
+    indexes: Optional[Union[int, Sequence[int]]] = None,
+    expression: Optional[str] = None,
+    nodata: Optional[float] = None,
+    unscale: bool = False,
+    **kwargs: Any,
+) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+    """Read the pixel values of many points from a dataset reader.
+
+    Points are grouped by the dataset internal blocks and each block is read
+    once. Points outside the dataset are masked.
+
+    Returns:
+        tuple: Masked array of shape (bands, points) and band names.
+
+    """
+    dataset = src_dst.dataset
+
+    if isinstance(indexes, int):
+        indexes = (indexes,)
+
+    if expression:
+        indexes = parse_expression(expression)
+
+    indexes = tuple(indexes or range(1, dataset.count + 1))
+
+    xs = numpy.asarray(xs, dtype="float64")
+    ys = numpy.asarray(ys, dtype="float64")
+    if len(xs) and coord_crs != dataset.crs:
+        xs, ys = map(numpy.asarray, transform(coord_crs, dataset.crs, xs, ys))
+
+    cols, rows = ~dataset.transform * (xs, ys)
+    cols = numpy.floor(cols).astype("int64")
+    rows = numpy.floor(rows).astype("int64")
+    inside = (rows >= 0) & (rows < dataset.height) & (cols >= 0) & (cols < dataset.width)
+
+    dtype = "float64" if unscale else dataset.dtypes[0]
+    values = numpy.ma.masked_all((len(indexes), len(xs)), dtype=dtype)
+
+    block_height, block_width = dataset.block_shapes[0]
+    blocks = (rows // block_height) * (dataset.width // block_width + 1) + (
+        cols // block_width
+    )
+    for block in numpy.unique(blocks[inside]):
+        selected = numpy.flatnonzero(inside & (blocks == block))
+        row_off = rows[selected[0]] // block_height * block_height
+        col_off = cols[selected[0]] // block_width * block_width
+        window = Window(
+            col_off,
+            row_off,
+            min(block_width, dataset.width - col_off),
+            min(block_height, dataset.height - row_off),
+        )
+        data = dataset.read(indexes, window=window, masked=True)
+        if nodata is not None:
+            data = numpy.ma.masked_where(data == nodata, data)
+
+        data = data[:, rows[selected] - row_off, cols[selected] - col_off]
+        if unscale:
+            scales = numpy.array([dataset.scales[ix - 1] for ix in indexes])
+            offsets = numpy.array([dataset.offsets[ix - 1] for ix in indexes])
+            data = data * scales[:, None] + offsets[:, None]
+
+        values[:, selected] = data
+
+    band_names = [f"b{ix}" for ix in indexes]
+    if expression:
+        img = ImageData(values[:, None, :], band_names=band_names).apply_expression(
+            expression
+        )
+        return img.array[:, 0, :], img.band_names
+
+    return values, band_names
+
+
+def read_points_each(
+    src_dst: Any,
+    xs: Sequence[float],
+    ys: Sequence[float],
+    **kwargs: Any,
+) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+    """Read the pixel values of many points, one point after another.
+
+    Used for the readers without a single dataset (e.g `MultiBandReader`). Points
+    outside the dataset are masked.
+
+    Returns:
+        tuple: Masked array of shape (bands, points) and band names.
+
+    """
+    values: List[Optional[numpy.ma.MaskedArray]] = []
+    band_names: List[str] = []
+    for x, y in zip(xs, ys):
+        try:
+            pt = src_dst.point(x, y, **kwargs)
+        except (PointOutsideBounds, EmptyMosaicError):
+            values.append(None)
+            continue
+
+        band_names = band_names or pt.band_names
+        values.append(pt.array)
+
+    if not band_names:
+        raise PointOutsideBounds("Points are outside the dataset bounds")
+
+    array = numpy.ma.masked_all((len(band_names), len(values)), dtype="float64")
+    for ix, value in enumerate(values):
+        if value is not None:
+            array[:, ix] = value
+
+    return array, band_names
+
+
+def aggregate_windows(
+    values: numpy.ma.MaskedArray,
+    window: int,
+    method: str = "mean",
+) -> numpy.ma.MaskedArray:
+    """Aggregate consecutive values (along the first axis) by windows of `window`.
+
+    The last window is shorter when the number of values isn't a multiple of
+    `window`. Masked values are ignored.
+
+    Args:
+        values (numpy.ma.MaskedArray): Values, e.g of shape (time, bands, points).
+        window (int): Number of values by window.
+        method (str): Aggregation method (`mean`, `min` or `max`).
+
+    Returns:
+        numpy.ma.MaskedArray: Aggregated values, of shape (windows, ...).
+
+    """
+    if window < 1:
+        raise ValueError("Window must be greater than 0.")
+
+    if method not in ("mean", "min", "max"):
+        raise ValueError(f"Invalid aggregation method: {method}")
+
+    count = values.shape[0]
+    windows = -(-count // window)
+
+    # Pad with masked values to stack the windows in one array
+    stacked = numpy.ma.masked_all((windows * window, *values.shape[1:]), values.dtype)
+    stacked[:count] = values
+    stacked = stacked.reshape(windows, window, *values.shape[1:])
+
+    return getattr(numpy.ma, method)(stacked, axis=1)
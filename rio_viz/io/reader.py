@@ -1,65 +1,484 @@
 """rio-viz multifile reader."""
 
-from typing import List, Type
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+from xml.sax.saxutils import escape
 
 import attr
+import numpy
+import rasterio
 from braceexpand import braceexpand
+from morecantile import TileMatrixSet
+from rasterio.dtypes import dtype_rev, typename_fwd
+from rasterio.enums import MaskFlags
 from rio_tiler import io
-from rio_tiler.errors import InvalidBandName
+from rio_tiler.constants import MAX_THREADS
+from rio_tiler.errors import InvalidBandName, MissingAssets, MissingBands
+from rio_tiler.models import ImageData, Info, PointData
+from rio_tiler.tasks import create_tasks, filter_tasks
 from rio_tiler.types import AssetInfo
+from rio_tiler.utils import cast_to_sequence
+
+from rio_viz.cache import LRUCache, get_dataset_version
+from rio_viz.env import in_env, reader_in_env
+from rio_viz.io.points import read_points
+from rio_viz.metrics import FilesCounter
+
+# Reference file metadata, shared by the readers of the process
+_reference_cache = LRUCache(maxsize=256)
+
+
+def _reference_metadata(
+    reader: Type[io.BaseReader],
+    input: str,
+    tms: TileMatrixSet,
+    reader_options: Dict,
+    prefix: str,
+) -> Dict[str, Any]:
+    """Return the files (by name), bounds, crs and zooms of a brace expanded input.
+
+    Metadata are read from the first file and cached by `(input, tms, reader_options)`.
+    The cached entry is renewed when the first file modification time or size change.
+
+    """
+    key = (input, prefix, tms.id, repr(sorted(reader_options.items())))
+    meta = _reference_cache.get(key)
+    if meta is not None and meta["version"] == get_dataset_version(meta["reference"]):
+        return meta
+
+    files = list(braceexpand(input))
+    with reader(files[0], tms=tms, **reader_options) as src_dst:
+        meta = {
+            "urls": {f"{prefix}{ix + 1}": path for ix, path in enumerate(files)},
+            "reference": files[0],
+            "version": get_dataset_version(files[0]),
+            "bounds": src_dst.bounds,
+            "crs": src_dst.crs,
+            "minzoom": src_dst.minzoom,
+            "maxzoom": src_dst.maxzoom,
+        }
+
+    _reference_cache.set(key, meta, size=1)
+    return meta
+
+
+def _stacked_vrt(input: str) -> Optional[str]:
+    """Return a VRT (XML) stacking the single band files of a brace expanded input.
+
+    Returns `None` when the files don't share the same grid (crs, transform and
+    size), data type and nodata, or have masks the VRT can't carry (e.g internal
+    masks). Results are cached by input and renewed when the files change.
+
+    """
+    key = ("stack", input)
+    version = get_dataset_version(input)
+    cached = _reference_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    grid = None
+    paths = []
+    for path in braceexpand(input):
+        with rasterio.open(path) as src_dst:
+            meta = (
+                src_dst.crs,
+                src_dst.transform,
+                src_dst.width,
+                src_dst.height,
+                src_dst.dtypes[0],
+                str(src_dst.nodata),
+            )
+            if (
+                src_dst.count != 1
+                or MaskFlags.per_dataset in src_dst.mask_flag_enums[0]
+                or (grid is not None and meta != grid)
+            ):
+                _reference_cache.set(key, (version, None), size=1)
+                return None
+
+            grid = meta
+            nodata = src_dst.nodata
+            # local files are referenced by absolute path (GDAL path otherwise)
+            paths.append(os.path.abspath(path) if os.path.exists(path) else src_dst.name)
+
+    crs, transform, width, height, dtype, _ = grid
+    nodata_tag = f"<NoDataValue>{nodata!r}</NoDataValue>" if nodata is not None else ""
+
+    bands = []
+    for ix, path in enumerate(paths):
+        bands.append(
+            f'<VRTRasterBand dataType="{typename_fwd[dtype_rev[dtype]]}" band="{ix + 1}">'
+            f"{nodata_tag}"
+            "<SimpleSource>"
+            f'<SourceFilename relativeToVRT="0">{escape(path)}</SourceFilename>'
+            "<SourceBand>1</SourceBand>"
+            f'<SrcRect xOff="0" yOff="0" xSize="{width}" ySize="{height}"/>'
+            f'<DstRect xOff="0" yOff="0" xSize="{width}" ySize="{height}"/>'
+            "</SimpleSource>"
+            "</VRTRasterBand>"
+        )
+
+    vrt = (
+        f'<VRTDataset rasterXSize="{width}" rasterYSize="{height}">'
+        f"<SRS>{escape(crs.to_wkt())}</SRS>"
+        f"<GeoTransform>{', '.join(map(repr, transform.to_gdal()))}</GeoTransform>"
+        f"{''.join(bands)}"
+        "</VRTDataset>"
+    )
+    _reference_cache.set(key, (version, vrt), size=1)
+    return vrt
+
+
+@contextmanager
+def _files_in_env(src_dst: Union[io.MultiBandReader, io.MultiBaseReader]) -> Iterator:
+    """Open the files with the calling thread GDAL configuration.
+
+    rio-tiler opens the band/asset files with `src_dst.reader` in its reading
+    threads, so the reader is replaced (for the call) by one forwarding the
+    configuration (see `rio_viz.env`).
+
+    """
+    reader = src_dst.reader
+    src_dst.reader = reader_in_env(reader)
+    try:
+        yield
+    finally:
+        src_dst.reader = reader
 
 
 @attr.s
 class MultiFilesBandsReader(io.MultiBandReader):
-    """Multiple Files as Bands."""
+    """Multiple Files as Bands.
+
+    Band files are read in parallel, with `threads` threads (e.g
+    `--reader-params threads=4`). Defaults to `rio_tiler.constants.MAX_THREADS`,
+    use `0` or `1` to read the files one after another.
+
+    With `stack=True` (e.g `--reader-params stack=true`) and when the band files
+    share the same grid, tiles, parts, previews, points and features are read
+    from one multi-band VRT stacking the files (one GDAL read for all the bands).
+    The band files are read separately otherwise.
+
+    """
 
     reader: Type[io.BaseReader] = attr.ib(default=io.Reader, init=False)
 
-    _files: List[str] = attr.ib(init=False)
+    threads: int = attr.ib(default=MAX_THREADS, converter=int)
+    stack: bool = attr.ib(default=False, converter=attr.converters.to_bool)
+
+    files_opened: FilesCounter = attr.ib(init=False, factory=FilesCounter)
+
+    _urls: Dict[str, str] = attr.ib(init=False)
+    _stack: Optional[io.BaseReader] = attr.ib(init=False, default=None)
 
     def __attrs_post_init__(self):
-        """Fetch Reference band to get the bounds."""
-        self._files = list(braceexpand(self.input))
-        self.bands = [f"b{ix + 1}" for ix in range(len(self._files))]
+        """Get the bounds from the (cached) reference file metadata."""
+        meta = _reference_metadata(
+            self.reader, self.input, self.tms, self.reader_options, "b"
+        )
+        self._urls = meta["urls"]
+        self.bands = list(self._urls)
+        self.bounds = meta["bounds"]
+        self.crs = meta["crs"]
+        self.minzoom = meta["minzoom"]
+        self.maxzoom = meta["maxzoom"]
+
+        if self.stack:
+            vrt = _stacked_vrt(self.input)
+            if vrt is not None:
+                self._stack = self.reader(vrt, tms=self.tms, **self.reader_options)
 
-        with self.reader(self._files[0], tms=self.tms, **self.reader_options) as cog:
-            self.bounds = cog.bounds
-            self.crs = cog.crs
-            self.minzoom = cog.minzoom
-            self.maxzoom = cog.maxzoom
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the stacked VRT."""
+        if self._stack is not None:
+            self._stack.close()
 
     def _get_band_url(self, band: str) -> str:
         """Validate band's name and return band's url."""
-        if band not in self.bands:
-            raise InvalidBandName(f"{band} is not valid")
+        try:
+            url = self._urls[band]
+        except KeyError as e:
+            raise InvalidBandName(f"{band} is not valid") from e
+
+        self.files_opened.add()
+        return url
+
+    def _read(
+        self,
+        method: str,
+        *args: Any,
+        bands: Optional[Union[Sequence[str], str]] = None,
+        expression: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Read from the stacked VRT, or from the band files (in parallel)."""
+        if self._stack is None or not (bands or expression):
+            with _files_in_env(self):
+                return getattr(super(), method)(
+                    *args,
+                    bands=bands,
+                    expression=expression,
+                    threads=self.threads,
+                    **kwargs,
+                )
+
+        if expression:
+            # VRT band `bN` is the file `bN`, so the expression is used as is
+            for band in self.parse_expression(expression):
+                self._get_band_url(band)
+
+            return getattr(self._stack, method)(*args, expression=expression, **kwargs)
+
+        bands = cast_to_sequence(bands)
+        for band in bands:
+            self._get_band_url(band)
+
+        indexes = [int(band[1:]) for band in bands]
+        return getattr(self._stack, method)(*args, indexes=indexes, **kwargs)
+
+    def info(self, *args: Any, **kwargs: Any) -> Info:
+        """Return metadata from the band files (read in parallel)."""
+        with _files_in_env(self):
+            return super().info(*args, threads=self.threads, **kwargs)
+
+    def tile(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a tile from the band files."""
+        return self._read("tile", *args, **kwargs)
+
+    def part(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read part of the band files."""
+        return self._read("part", *args, **kwargs)
+
+    def preview(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a preview of the band files."""
+        return self._read("preview", *args, **kwargs)
+
+    def point(self, *args: Any, **kwargs: Any) -> PointData:
+        """Read a pixel value from the band files."""
+        return self._read("point", *args, **kwargs)
+
+    def feature(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a feature from the band files."""
+        return self._read("feature", *args, **kwargs)
+
+    def points(
+        self,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        bands: Optional[Union[Sequence[str], str]] = None,
+        expression: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+        """Read the pixel values of many points in the band files.
 
-        index = self.bands.index(band)
-        return self._files[index]
+        Each band file (or the stacked VRT) is read once for all the points, with
+        `rio_viz.io.points.read_points`. Points outside the files are masked.
+
+        Returns:
+            tuple: Masked array of shape (bands, points) and band names.
+
+        """
+        if expression:
+            bands = self.parse_expression(expression)
+
+        bands = cast_to_sequence(bands) or self.default_bands
+        if not bands:
+            raise MissingBands(
+                "bands must be passed either via `expression` or `bands` options."
+            )
+
+        if self._stack is not None:
+            # VRT band `bN` is the file `bN`
+            indexes = []
+            for band in bands:
+                self._get_band_url(band)
+                indexes.append(int(band[1:]))
+
+            values, band_names = read_points(
+                self._stack, xs, ys, indexes=indexes, **kwargs
+            )
+
+        else:
+
+            def _reader(band: str) -> numpy.ma.MaskedArray:
+                url = self._get_band_url(band)
+                with self.reader(url, tms=self.tms, **self.reader_options) as src_dst:
+                    return read_points(src_dst, xs, ys, **kwargs)[0]
+
+            tasks = create_tasks(in_env(_reader), bands, self.threads)
+            values = numpy.ma.concatenate([data for data, _ in filter_tasks(tasks)])
+            band_names = list(bands)
+
+        if expression:
+            img = ImageData(values[:, None, :], band_names=band_names).apply_expression(
+                expression
+            )
+            return img.array[:, 0, :], img.band_names
+
+        return values, band_names
 
 
 @attr.s
 class MultiFilesAssetsReader(io.MultiBaseReader):
-    """Multiple Files as Assets."""
+    """Multiple Files as Assets.
+
+    Asset files are read in parallel, with `threads` threads (e.g
+    `--reader-params threads=4`). Defaults to `rio_tiler.constants.MAX_THREADS`,
+    use `0` or `1` to read the files one after another.
+
+    """
 
     reader: Type[io.BaseReader] = attr.ib(default=io.Reader, init=False)
 
-    _files: List[str] = attr.ib(init=False)
+    threads: int = attr.ib(default=MAX_THREADS, converter=int)
 
-    def __attrs_post_init__(self):
-        """Fetch Reference band to get the bounds."""
-        self._files = list(braceexpand(self.input))
-        self.assets = [f"asset{ix + 1}" for ix in range(len(self._files))]
+    files_opened: FilesCounter = attr.ib(init=False, factory=FilesCounter)
 
-        with self.reader(self._files[0], tms=self.tms, **self.reader_options) as cog:
-            self.bounds = cog.bounds
-            self.crs = cog.crs
-            self.minzoom = cog.minzoom
-            self.maxzoom = cog.maxzoom
+    _urls: Dict[str, str] = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        """Get the bounds from the (cached) reference file metadata."""
+        meta = _reference_metadata(
+            self.reader, self.input, self.tms, self.reader_options, "asset"
+        )
+        self._urls = meta["urls"]
+        self.assets = list(self._urls)
+        self.bounds = meta["bounds"]
+        self.crs = meta["crs"]
+        self.minzoom = meta["minzoom"]
+        self.maxzoom = meta["maxzoom"]
 
     def _get_asset_info(self, asset: str) -> AssetInfo:
         """Validate band's name and return band's url."""
-        if asset not in self.assets:
-            raise InvalidBandName(f"{asset} is not valid")
+        try:
+            url = self._urls[asset]
+        except KeyError as e:
+            raise InvalidBandName(f"{asset} is not valid") from e
+
+        self.files_opened.add()
+        return AssetInfo(url=url)
+
+    def info(self, *args: Any, **kwargs: Any) -> Dict[str, Info]:
+        """Return metadata from the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().info(*args, threads=self.threads, **kwargs)
+
+    def tile(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a tile from the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().tile(*args, threads=self.threads, **kwargs)
+
+    def part(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read part of the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().part(*args, threads=self.threads, **kwargs)
+
+    def preview(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a preview of the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().preview(*args, threads=self.threads, **kwargs)
+
+    def point(self, *args: Any, **kwargs: Any) -> PointData:
+        """Read a pixel value from the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().point(*args, threads=self.threads, **kwargs)
+
+    def feature(self, *args: Any, **kwargs: Any) -> ImageData:
+        """Read a feature from the asset files (read in parallel)."""
+        with _files_in_env(self):
+            return super().feature(*args, threads=self.threads, **kwargs)
+
+    def points(
+        self,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        assets: Optional[Union[Sequence[str], str]] = None,
+        expression: Optional[str] = None,
+        asset_indexes: Optional[Dict[str, Any]] = None,
+        asset_as_band: bool = False,
+        indexes: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+        """Read the pixel values of many points in the asset files.
+
+        Each asset file is read once for all the points (in parallel), with
+        `rio_viz.io.points.read_points`. Points outside the files are masked.
+
+        Returns:
+            tuple: Masked array of shape (bands, points) and band names.
+
+        """
+        if expression:
+            assets = self.parse_expression(expression, asset_as_band=asset_as_band)
+
+        assets = cast_to_sequence(assets) or self.default_assets
+        if not assets:
+            raise MissingAssets(
+                "assets must be passed via `expression` or `assets` options."
+            )
+
+        asset_indexes = asset_indexes or {}
+
+        def _reader(asset: str) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+            url = self._get_asset_info(asset)["url"]
+            with self.reader(url, tms=self.tms, **self.reader_options) as src_dst:
+                return read_points(
+                    src_dst, xs, ys, indexes=asset_indexes.get(asset) or indexes, **kwargs
+                )
+
+        results = list(filter_tasks(create_tasks(in_env(_reader), assets, self.threads)))
+        values = numpy.ma.concatenate([data for (data, _), _ in results])
+        band_names = [
+            asset if asset_as_band else f"{asset}_{name}"
+            for (_, names), asset in results
+            for name in names
+        ]
+
+        if expression:
+            img = ImageData(values[:, None, :], band_names=band_names).apply_expression(
+                expression
+            )
+            return img.array[:, 0, :], img.band_names
+
+        return values, band_names
+
+    def timeseries(
+        self,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        assets: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> Tuple[numpy.ma.MaskedArray, List[str], List[str]]:
+        """Read the pixel values of many points in every asset file.
+
+        Files are read in parallel (`threads`), each one with
+        `rio_viz.io.points.read_points`. Points outside a file are masked.
+
+        Args:
+            xs (sequence of float): X coordinates.
+            ys (sequence of float): Y coordinates.
+            assets (sequence of str, optional): Assets to read (default to all).
+            kwargs (optional): Options to forward to `read_points` (e.g `coord_crs`,
+                `indexes` or a band `expression`).
+
+        Returns:
+            tuple: Masked array of shape (assets, bands, points), asset and band names.
+
+        """
+        assets = list(assets or self.assets)
+
+        def _reader(asset: str) -> Tuple[numpy.ma.MaskedArray, List[str]]:
+            url = self._get_asset_info(asset)["url"]
+            with self.reader(url, tms=self.tms, **self.reader_options) as src_dst:
+                return read_points(src_dst, xs, ys, **kwargs)
+
+        results = [
+            result
+            for result, _ in filter_tasks(
+                create_tasks(in_env(_reader), assets, self.threads)
+            )
+        ]
+        values = numpy.ma.stack([result for result, _ in results])
 
-        index = self.assets.index(asset)
-        return AssetInfo(url=self._files[index])
+        return values, assets, results[0][1]
@@ -0,0 +1,179 @@
+"""rio-viz mergeable statistics.
+
+Statistics of multiple datasets are computed from per-band summaries (count,
+sum, sum of squares, min, max and value counts) which can be merged without
+keeping the datasets arrays in memory. Value counts are exact until there are
+more than `MAX_VALUES` distinct values, then they are approximated by a fixed
+number of bins, so percentiles and histograms are approximate for continuous data
+and the number of unique values is unknown (`nan`).
+
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy
+
+# Maximum number of distinct values (or bins) kept in a summary
+MAX_VALUES = 4096
+
+
+def _compact(
+    values: numpy.ndarray, counts: numpy.ndarray, vmin: float, vmax: float
+) -> Dict[str, Any]:
+    """Merge identical values and bin them when there are too many."""
+    if len(values) > MAX_VALUES:
+        counts, edges = numpy.histogram(
+            values, bins=MAX_VALUES, range=(vmin, vmax), weights=counts
+        )
+        values = (edges[:-1] + edges[1:]) / 2
+        keep = counts > 0
+        return {
+            "values": values[keep],
+            "counts": counts[keep].astype("int64"),
+            "binned": True,
+        }
+
+    values, inverse = numpy.unique(values, return_inverse=True)
+    counts = numpy.bincount(inverse.ravel(), weights=counts, minlength=len(values))
+    return {"values": values, "counts": counts.astype("int64"), "binned": False}
+
+
+def summarize(data: numpy.ma.MaskedArray) -> List[Dict[str, Any]]:
+    """Return per-band summaries of a masked array."""
+    if data.ndim < 3:
+        data = numpy.ma.expand_dims(data, axis=0)
+
+    # Avoid non masked nan/inf values
+    data = numpy.ma.fix_invalid(data)
+
+    summaries = []
+    for band in data:
+        values = band.compressed().astype("float64")
+        summary: Dict[str, Any] = {
+            "count": values.size,
+            "masked": int(numpy.ma.count_masked(band)),
+            "sum": float(values.sum()),
+            "sumsq": float(numpy.square(values).sum()),
+            "min": float(values.min()) if values.size else numpy.inf,
+            "max": float(values.max()) if values.size else -numpy.inf,
+        }
+        values, counts = numpy.unique(values, return_counts=True)
+        summary.update(_compact(values, counts, summary["min"], summary["max"]))
+        summaries.append(summary)
+
+    return summaries
+
+
+def merge(
+    summaries: Optional[List[Dict[str, Any]]], other: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Merge two lists of per-band summaries."""
+    if summaries is None:
+        return other
+
+    merged = []
+    for a, b in zip(summaries, other):
+        summary = {
+            "count": a["count"] + b["count"],
+            "masked": a["masked"] + b["masked"],
+            "sum": a["sum"] + b["sum"],
+            "sumsq": a["sumsq"] + b["sumsq"],
+            "min": min(a["min"], b["min"]),
+            "max": max(a["max"], b["max"]),
+        }
+        summary.update(
+            _compact(
+                numpy.concatenate([a["values"], b["values"]]),
+                numpy.concatenate([a["counts"], b["counts"]]),
+                summary["min"],
+                summary["max"],
+            )
+        )
+        summary["binned"] = summary["binned"] or a["binned"] or b["binned"]
+        merged.append(summary)
+
+    return merged
+
+
+def _quantile(values: numpy.ndarray, cumulative: numpy.ndarray, q: float) -> float:
+    """Return the `q` quantile of sorted values from their cumulative counts."""
+    index = numpy.searchsorted(cumulative, q * cumulative[-1], side="left")
+    return float(values[min(index, len(values) - 1)])
+
+
+def get_statistics(
+    summary: Dict[str, Any],
+    categorical: bool = False,
+    categories: Optional[Sequence[float]] = None,
+    percentiles: Optional[Sequence[int]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Return band statistics (as `rio_tiler.utils.get_array_statistics`) from a summary.
+
+    `kwargs` are forwarded to `numpy.histogram` (only applies for non-categorical data).
+
+    """
+    percentiles = percentiles or [2, 98]
+    percentiles_names = [f"percentile_{int(p)}" for p in percentiles]
+
+    values = summary["values"]
+    counts = summary["counts"]
+    count = summary["count"]
+    masked = summary["masked"]
+
+    if categorical:
+        out_dict = dict(zip(values.tolist(), counts.tolist()))
+        h_keys = (
+            numpy.array(categories).astype(values.dtype) if categories else values
+        ).tolist()
+        histogram = [[out_dict.get(x, 0) for x in h_keys], h_keys]
+    else:
+        if "range" not in kwargs and count:
+            kwargs["range"] = (summary["min"], summary["max"])
+
+        h_counts, h_keys = numpy.histogram(values, weights=counts, **kwargs)
+        histogram = [h_counts.astype("int64").tolist(), h_keys.tolist()]
+
+    stats: Dict[str, Any]
+    if count:
+        cumulative = numpy.cumsum(counts)
+        mean = summary["sum"] / count
+        stats = {
+            "min": summary["min"],
+            "max": summary["max"],
+            "mean": mean,
+            "count": float(count),
+            "sum": summary["sum"],
+            "std": float(numpy.sqrt(max(summary["sumsq"] / count - mean**2, 0))),
+            "median": _quantile(values, cumulative, 0.5),
+            "majority": float(values[numpy.argmax(counts)]),
+            "minority": float(values[numpy.argmin(counts)]),
+            **{
+                name: _quantile(values, cumulative, p / 100.0)
+                for name, p in zip(percentiles_names, percentiles)
+            },
+        }
+    else:
+        stats = {
+            "min": numpy.nan,
+            "max": numpy.nan,
+            "mean": numpy.nan,
+            "count": 0,
+            "sum": 0,
+            "std": numpy.nan,
+            "median": numpy.nan,
+            "majority": numpy.nan,
+            "minority": numpy.nan,
+            **dict.fromkeys(percentiles_names, numpy.nan),
+        }
+
+    return {
+        **stats,
+        "unique": numpy.nan if summary["binned"] else float(len(values)),
+        "histogram": histogram,
+        "valid_pixels": float(count),
+        "masked_pixels": float(masked),
+        "valid_percent": round(count / (count + masked) * 100, 2)
+        if count + masked
+        else 0.0,
+    }
@@ -0,0 +1,304 @@
+"""rio-viz metrics (Prometheus text format)."""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import attr
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Bytes
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(8))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Metrics and route of the request being processed
+_current: ContextVar[Optional[Tuple["Metrics", str]]] = ContextVar(
+    "rio_viz_metrics", default=None
+)
+
+# Number of files opened by the request being processed
+_files_opened: ContextVar[Optional[List[int]]] = ContextVar(
+    "rio_viz_files_opened", default=None
+)
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format labels as `{name="value",...}`."""
+    if not labels:
+        return ""
+
+    values = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + values + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@attr.s
+class _Metric:
+    """Base metric with labeled values."""
+
+    name: str = attr.ib()
+    description: str = attr.ib()
+
+    type: str = attr.ib(init=False, default="untyped")
+
+    _values: Dict[Labels, Any] = attr.ib(init=False, factory=dict)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def header(self) -> List[str]:
+        """Return HELP and TYPE lines."""
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def samples(self) -> List[str]:
+        """Return sample lines."""
+        with self._lock:
+            values = list(self._values.items())
+
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in sorted(values)
+        ]
+
+    def render(self) -> List[str]:
+        """Return the metric in Prometheus text format."""
+        return self.header() + self.samples()
+
+
+@attr.s
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type: str = attr.ib(init=False, default="counter")
+
+    def inc(self, value: float = 1, **labels: str):
+        """Increment the counter."""
+        key = tuple(labels.items())
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+@attr.s
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type: str = attr.ib(init=False, default="gauge")
+
+    def inc(self, value: float = 1, **labels: str):
+        """Increment the gauge."""
+        key = tuple(labels.items())
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels: str):
+        """Decrement the gauge."""
+        self.inc(-value, **labels)
+
+    def set(self, value: float, **labels: str):
+        """Set the gauge value."""
+        with self._lock:
+            self._values[tuple(labels.items())] = value
+
+
+@attr.s
+class Histogram(_Metric):
+    """Distribution of values in cumulative buckets."""
+
+    buckets: Sequence[float] = attr.ib(default=LATENCY_BUCKETS)
+
+    type: str = attr.ib(init=False, default="histogram")
+
+    def observe(self, value: float, **labels: str):
+        """Add an observation."""
+        key = tuple(labels.items())
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                # bucket counts (non cumulative), sum, count
+                data = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+
+            for ix, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[0][ix] += 1
+                    break
+
+            data[1] += value
+            data[2] += 1
+
+    def samples(self) -> List[str]:
+        """Return sample lines."""
+        with self._lock:
+            values = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._values.items()
+            ]
+
+        lines = []
+        for labels, counts, total, count in sorted(values):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(labels + (("le", _format_value(float(bound))),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+
+            le = _format_labels(labels + (("le", "+Inf"),))
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+
+        return lines
+
+
+@attr.s
+class Metrics:
+    """Server metrics registry.
+
+    Request metrics are recorded by `rio_viz.middleware.MetricsMiddleware` and
+    processing phases with `timer`. Statistics of other components (e.g caches)
+    are collected when rendering, with `register`.
+
+    """
+
+    requests: Counter = attr.ib(
+        init=False,
+        factory=lambda: Counter("rio_viz_requests_total", "Number of responses."),
+    )
+    in_flight: Gauge = attr.ib(
+        init=False,
+        factory=lambda: Gauge(
+            "rio_viz_requests_in_flight", "Number of requests being processed."
+        ),
+    )
+    duration: Histogram = attr.ib(
+        init=False,
+        factory=lambda: Histogram(
+            "rio_viz_request_duration_seconds", "Request processing time."
+        ),
+    )
+    size: Histogram = attr.ib(
+        init=False,
+        factory=lambda: Histogram(
+            "rio_viz_response_size_bytes", "Response body size.", SIZE_BUCKETS
+        ),
+    )
+    phases: Histogram = attr.ib(
+        init=False,
+        factory=lambda: Histogram(
+            "rio_viz_phase_duration_seconds",
+            "Processing time by request phase (open, read, post_process, render, encode).",
+        ),
+    )
+
+    _collectors: List[Tuple[str, str, Callable[[], Dict[str, Any]]]] = attr.ib(
+        init=False, factory=list
+    )
+
+    def register(self, prefix: str, description: str, func: Callable[[], Dict]):
+        """Export the numeric values of `func()` as `{prefix}_{key}` gauges."""
+        self._collectors.append((prefix, description, func))
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text format."""
+        lines = []
+        for metric in [
+            self.requests,
+            self.in_flight,
+            self.duration,
+            self.size,
+            self.phases,
+        ]:
+            lines.extend(metric.render())
+
+        for prefix, description, func in self._collectors:
+            for key, value in func().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+
+                name = f"{prefix}_{key}"
+                lines.append(f"# HELP {name} {description} ({key}).")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    @contextmanager
+    def bind(self, route: str) -> Iterator[None]:
+        """Record the phases timed in the context for `route`."""
+        token = _current.set((self, route))
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+
+@contextmanager
+def timer(phase: str) -> Iterator[None]:
+    """Time a processing phase of the current request (no-op outside requests)."""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+
+    metrics, route = current
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases.observe(time.perf_counter() - start, route=route, phase=phase)
+
+
+@attr.s
+class FilesCounter:
+    """Thread-safe count of the files opened by a reader."""
+
+    count: int = attr.ib(init=False, default=0)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def add(self, value: int = 1):
+        """Increment the count."""
+        with self._lock:
+            self.count += value
+
+    def pop(self) -> int:
+        """Return the count and reset it."""
+        with self._lock:
+            count, self.count = self.count, 0
+
+        return count
+
+
+@contextmanager
+def files_report() -> Iterator[List[int]]:
+    """Collect the numbers of files opened in the context (see `count_files`)."""
+    report: List[int] = []
+    token = _files_opened.set(report)
+    try:
+        yield report
+    finally:
+        _files_opened.reset(token)
+
+
+def count_files(count: int):
+    """Add opened files to the current request report (no-op outside requests)."""
+    report = _files_opened.get()
+    if report is not None:
+        report.append(count)
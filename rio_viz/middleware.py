@@ -0,0 +1,259 @@
+"""rio-viz middlewares."""
+
+import hashlib
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Sequence, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from rio_viz.metrics import Metrics, files_report
+
+
+def route_name(path: str) -> str:
+    """Return the route name of a path (first path segment, without extension).
+
+    e.g `/tiles/WebMercatorQuad/1/0/0.png` -> `tiles`, `/preview.png` -> `preview`
+
+    """
+    name = path.lstrip("/").split("/", 1)[0].split(".", 1)[0]
+    return name or "index"
+
+
+class CacheControlMiddleware:
+    """Add a per-route `Cache-Control` header to GET/HEAD responses.
+
+    Args:
+        app (ASGIApp): starlette/FastAPI application.
+        cachecontrol (str, optional): Default Cache-Control value.
+        rules (dict, optional): Cache-Control value by route name (see `route_name`),
+            overriding the default. Set an empty value to not add the header.
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cachecontrol: Optional[str] = None,
+        rules: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Init Middleware."""
+        self.app = app
+        self.cachecontrol = cachecontrol
+        self.rules = rules or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http" or scope["method"] not in ["HEAD", "GET"]:
+            await self.app(scope, receive, send)
+            return
+
+        cachecontrol = self.rules.get(route_name(scope["path"]), self.cachecontrol)
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            if message["type"] == "http.response.start" and cachecontrol:
+                response_headers = MutableHeaders(scope=message)
+                if message["status"] < 500 and not response_headers.get("Cache-Control"):
+                    response_headers["Cache-Control"] = cachecontrol
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class ETagMiddleware:
+    """Add a strong `ETag` to responses and answer conditional requests.
+
+    The ETag is derived from the dataset version, the request (path, normalized
+    query, host and accepted encodings) and a `salt` (e.g the server settings), so
+    it can be computed **before** handling the request: when it matches the request's
+    `If-None-Match` header, a `304 Not Modified` is returned without reading
+    the dataset. No ETag is returned when the dataset version is unknown (empty,
+    e.g for remote datasets).
+
+    Args:
+        app (ASGIApp): starlette/FastAPI application.
+        version (callable): Async function returning the current (hashable) dataset
+            version.
+        routes (sequence of str): Route names (see `route_name`) to handle.
+        salt (str): Extra value mixed in the ETag.
+        query_key (callable, optional): Function returning the normalized query
+            parameters of a request, so equivalent queries share their ETag.
+            Defaults to the raw query string.
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        version: Callable[[], Awaitable[Hashable]],
+        routes: Sequence[str],
+        salt: str = "",
+        query_key: Optional[Callable[[Request], Hashable]] = None,
+    ) -> None:
+        """Init Middleware."""
+        self.app = app
+        self.version = version
+        self.routes = set(routes)
+        self.salt = salt
+        self.query_key = query_key
+
+    def etag(self, scope: Scope, version: Hashable) -> str:
+        """Compute the ETag of a request."""
+        headers = Headers(scope=scope)
+        query = (
+            self.query_key(Request(scope)) if self.query_key else scope["query_string"]
+        )
+        key = repr(
+            (
+                self.salt,
+                version,
+                scope["path"],
+                query,
+                scope.get("scheme"),
+                headers.get("host"),
+                headers.get("accept-encoding"),
+            )
+        )
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ["HEAD", "GET"]
+            or route_name(scope["path"]) not in self.routes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Unknown version (e.g remote dataset): the ETag couldn't change when the
+        # dataset does, so none is returned
+        version = await self.version()
+        if not version:
+            await self.app(scope, receive, send)
+            return
+
+        etag = self.etag(scope, version)
+
+        if if_none_match := Headers(scope=scope).get("if-none-match"):
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if etag in tags or "*" in tags:
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [(b"etag", etag.encode())],
+                    }
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                MutableHeaders(scope=message)["ETag"] = etag
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """Record requests count, latency, response size and in-flight requests.
+
+    Requests are labeled by route name (see `route_name`), `other` for paths not
+    matching any of the application routes.
+
+    Args:
+        app (ASGIApp): starlette/FastAPI application.
+        metrics (Metrics): Metrics registry.
+
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics) -> None:
+        """Init Middleware."""
+        self.app = app
+        self.metrics = metrics
+        self._routes: Optional[Set[str]] = None
+
+    def route(self, scope: Scope) -> str:
+        """Return the route label of a request."""
+        if self._routes is None:
+            self._routes = {
+                route_name(route.path)
+                for route in getattr(scope.get("app"), "routes", [])
+                if hasattr(route, "path")
+            }
+
+        name = route_name(scope["path"])
+        return name if name in self._routes else "other"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self.route(scope)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+            await send(message)
+
+        self.metrics.in_flight.inc(route=route)
+        start = time.perf_counter()
+        try:
+            with self.metrics.bind(route):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.duration.observe(time.perf_counter() - start, route=route)
+            self.metrics.in_flight.dec(route=route)
+            self.metrics.requests.inc(
+                route=route, method=scope["method"], status=str(status)
+            )
+            self.metrics.size.observe(size, route=route)
+
+
+class FilesOpenedMiddleware:
+    """Add a `X-Files-Opened` header with the number of files opened by the request.
+
+    The header is only added to the responses of the requests using a reader
+    (e.g not for the cached tiles).
+
+    Args:
+        app (ASGIApp): starlette/FastAPI application.
+
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Init Middleware."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with files_report() as report:
+
+            async def send_wrapper(message: Message):
+                """Send Message."""
+                if message["type"] == "http.response.start" and report:
+                    response_headers = MutableHeaders(scope=message)
+                    response_headers["X-Files-Opened"] = str(sum(report))
+
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,183 @@
+"""rio-viz reader pool."""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+import attr
+import rasterio
+from rio_tiler.errors import RioTilerError
+
+from rio_viz.metrics import count_files, timer
+
+
+def open_reader(reader: Type, *args: Any, **kwargs: Any) -> Any:
+    """Create a reader instance, in its own GDAL environment.
+
+    Datasets opened outside a GDAL environment attach one to the current thread
+    and will fail to close from another thread.
+
+    """
+    with rasterio.Env():
+        return reader(*args, **kwargs)
+
+
+def _close(src_dst: Any):
+    """Close a reader instance."""
+    src_dst.__exit__(None, None, None)
+
+
+@attr.s
+class ReaderPool:
+    """Thread-safe pool of opened readers.
+
+    Readers are leased to one thread at a time (rasterio datasets are not thread
+    safe) and returned to the pool afterward so the next request can re-use the
+    already opened dataset instead of paying for the GDAL open again. A thread gets
+    back the reader it used last, when available, to keep its caches warm.
+
+    Args:
+        reader (BaseReader, MultiBandReader or MultiBaseReader): Reader class.
+        input (str): Dataset path.
+        options (dict): Options to forward to the reader.
+        max_size (int): Maximum number of readers kept in the pool. When all of them
+            are leased, a temporary reader is created and closed after use.
+            Set to `0` to disable pooling. Defaults to `8`.
+        max_idle (float): Number of seconds after which an unused reader is closed.
+            Defaults to `300`.
+
+    """
+
+    reader: Type = attr.ib()
+    input: str = attr.ib()
+    options: Dict = attr.ib(factory=dict)
+
+    max_size: int = attr.ib(default=8)
+    max_idle: float = attr.ib(default=300.0)
+
+    _idle: List[Tuple[float, int, Any]] = attr.ib(init=False, factory=list)
+    _size: int = attr.ib(init=False, default=0)
+    _generation: int = attr.ib(init=False, default=0)
+    _closed: bool = attr.ib(init=False, default=False)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def _open(self) -> Any:
+        """Create a new reader."""
+        with timer("open"):
+            src_dst = open_reader(self.reader, self.input, **self.options).__enter__()
+
+        # Readers opening files on demand count them (see `get`)
+        if getattr(src_dst, "files_opened", None) is None:
+            count_files(1)
+
+        return src_dst
+
+    def _evict(self, now: float) -> List[Any]:
+        """Remove readers idle for more than `max_idle` seconds (lock must be held)."""
+        expired = [src for (ts, _, src) in self._idle if now - ts > self.max_idle]
+        if expired:
+            self._idle = [item for item in self._idle if now - item[0] <= self.max_idle]
+            self._size -= len(expired)
+
+        return expired
+
+    def acquire(self) -> Tuple[Any, Optional[int]]:
+        """Lease a reader.
+
+        Returns the reader and the pool generation it belongs to (`None` for
+        temporary readers), to pass to `release`.
+
+        """
+        with self._lock:
+            expired = self._evict(time.monotonic())
+            src_dst = None
+            generation = None
+            if self._idle:
+                thread_id = threading.get_ident()
+                index = next(
+                    (
+                        ix
+                        for ix in range(len(self._idle) - 1, -1, -1)
+                        if self._idle[ix][1] == thread_id
+                    ),
+                    -1,
+                )
+                _, _, src_dst = self._idle.pop(index)
+                generation = self._generation
+            elif not self._closed and self._size < self.max_size:
+                self._size += 1
+                generation = self._generation
+
+        for src in expired:
+            _close(src)
+
+        if src_dst is None:
+            try:
+                src_dst = self._open()
+            except BaseException:
+                with self._lock:
+                    if generation is not None and generation == self._generation:
+                        self._size -= 1
+                raise
+
+        return src_dst, generation
+
+    def release(self, src_dst: Any, generation: Optional[int], discard: bool = False):
+        """Return a leased reader to the pool."""
+        with self._lock:
+            if generation is not None and generation == self._generation:
+                if not (self._closed or discard):
+                    self._idle.append((time.monotonic(), threading.get_ident(), src_dst))
+                    return
+
+                self._size -= 1
+
+        _close(src_dst)
+
+    @contextmanager
+    def get(self) -> Iterator[Any]:
+        """Lease a reader for the duration of the context."""
+        src_dst, generation = self.acquire()
+        discard = False
+        try:
+            yield src_dst
+        except RioTilerError:
+            raise
+        except BaseException:
+            # The dataset handle might be in an invalid state (e.g IO error)
+            discard = True
+            raise
+        finally:
+            files_opened = getattr(src_dst, "files_opened", None)
+            count_files(files_opened.pop() if files_opened is not None else 0)
+
+            self.release(src_dst, generation, discard=discard)
+
+    def clear(self):
+        """Close all readers (leased readers are closed when released).
+
+        Use it when the dataset changed.
+
+        """
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+            self._size = 0
+
+        for _, _, src_dst in idle:
+            _close(src_dst)
+
+    def close(self):
+        """Close all idle readers and stop pooling."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+
+        for _, _, src_dst in idle:
+            _close(src_dst)
+
+    def __len__(self) -> int:
+        """Number of readers currently owned by the pool."""
+        return self._size
@@ -9,12 +9,16 @@ from contextlib import ExitStack, contextmanager
 
 import click
 import numpy
+import rasterio
 from rasterio.rio import options
 from rio_cogeo.cogeo import cog_translate, cog_validate
 from rio_cogeo.profiles import cog_profiles
 from rio_tiler.io import BaseReader, COGReader, MultiBandReader, MultiBaseReader
 
 from rio_viz import app
+from rio_viz.io import MosaicReader
+from rio_viz.io.manifest import write_manifest
+from rio_viz.io.methods import PixelSelectionMethod
 
 
 def options_to_dict(ctx, param, value):
@@ -141,6 +145,55 @@ class NodataParamType(click.ParamType):
     type=click.File(mode="r"),
     help="GeoJSON Feature or FeatureCollection path to display on viewer.",
 )
+@click.option(
+    "--tile-cache-size",
+    type=int,
+    default=0,
+    help="Size of the in-memory rendered tiles cache, in megabytes (default: 0, disabled).",
+)
+@click.option(
+    "--threads",
+    type=int,
+    help="Number of threads used to read and render the data (default: min(32, cpu_count + 4)).",
+)
+@click.option(
+    "--max-queue",
+    type=int,
+    default=100,
+    help="Maximum number of requests waiting for a thread before returning 503 (default: 100).",
+)
+@click.option(
+    "--max-wait",
+    type=float,
+    default=30.0,
+    help="Maximum number of seconds a request can wait for a thread before returning 503 (default: 30).",
+)
+@click.option(
+    "--precompute-statistics",
+    is_flag=True,
+    default=False,
+    help="Compute the viewer's dataset statistics in background when the server starts.",
+)
+@click.option(
+    "--cache-control",
+    "cache_control",
+    metavar="ROUTE=VALUE",
+    multiple=True,
+    callback=options_to_dict,
+    help="Cache-Control header by route name (e.g --cache-control tiles='public, max-age=3600'). Use `default` for the other routes (default: no-cache).",
+)
+@click.option(
+    "--empty-tiles",
+    type=click.Choice(["404", "204", "transparent"]),
+    default="404",
+    help="Response for the tiles outside the dataset: 404, 204 (No Content) or a transparent image (PNG and WebP only, 204 for other formats) (default: 404).",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of server processes (default: 1). Send SIGHUP to restart them.",
+)
 def viz(
     src_path,
     nodata,
@@ -155,6 +208,14 @@ def viz(
     config,
     reader_params,
     geojson,
+    tile_cache_size,
+    threads,
+    max_queue,
+    max_wait,
+    precompute_statistics,
+    cache_control,
+    empty_tiles,
+    workers,
 ):
     """Rasterio Viz cli."""
     if reader:
@@ -195,9 +256,141 @@ def viz(
             nodata=nodata,
             layers=layers,
             geojson=json.load(geojson) if geojson else None,
+            tile_cache_size=tile_cache_size * 1024 * 1024,
+            threads=threads,
+            max_queue=max_queue,
+            max_wait=max_wait,
+            precompute_statistics=precompute_statistics,
+            cache_control=cache_control,
+            empty_tiles=empty_tiles,
         )
         if not server_only:
             click.echo(f"Viewer started at {application.template_url}", err=True)
             click.launch(application.template_url)
 
-        application.start()
+        application.start(workers=workers)
+
+
+@click.group(short_help="Mosaic utilities.")
+def mosaic():
+    """Rasterio Viz mosaic utilities."""
+
+
+@mosaic.command(short_help="Create or update a mosaic manifest.")
+@click.argument("src_path", type=str, nargs=1, required=True)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Output manifest path.",
+)
+@click.option(
+    "--threads",
+    type=int,
+    default=0,
+    help="Number of threads used to read the files (default: MAX_THREADS environment variable or cpu_count * 5).",
+)
+@click.option(
+    "--overwrite",
+    is_flag=True,
+    default=False,
+    help="Re-create all the entries (by default only new or modified files are read).",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def manifest(src_path, output, threads, overwrite, config):
+    """Create a manifest of the mosaic datasets footprints.
+
+    Use it with `rio viz "file{1,2,3}.tif" --reader rio_viz.io.MosaicReader -p manifest=manifest.json`
+    to start the server without opening every file.
+
+    """
+    if overwrite and os.path.exists(output):
+        os.remove(output)
+
+    with rasterio.Env(**config):
+        with MosaicReader(src_path, threads=threads, manifest=output) as src_dst:
+            click.echo(f"{len(src_dst.footprints)} datasets in {output}", err=True)
+
+
+@mosaic.command(short_help="Create a low resolution overview of the mosaic.")
+@click.argument("src_path", type=str, nargs=1, required=True)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Output overview (COG) path.",
+)
+@click.option(
+    "--zoom",
+    type=int,
+    help="Zoom level of the overview (default: highest datasets minzoom).",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Mosaic manifest path, to record the overview in.",
+)
+@click.option(
+    "--pixel-selection",
+    type=click.Choice([m.value for m in PixelSelectionMethod]),
+    default="first",
+    help="Pixel selection method (default: first). `median` is approximate where more than 64 files overlap.",
+)
+@click.option("--tilesize", type=int, default=256, help="Tile size (default: 256).")
+@click.option(
+    "--threads",
+    type=int,
+    default=0,
+    help="Number of threads used to read the files (default: MAX_THREADS environment variable or cpu_count * 5).",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def overview(
+    src_path, output, zoom, manifest, pixel_selection, tilesize, threads, config
+):
+    """Create a low resolution overview of the whole mosaic.
+
+    Tiles up to the overview zoom are then read from the overview instead of the
+    datasets, when it is recorded in the manifest (`--manifest`) or set with
+    `-p overview=overview.tif`.
+
+    """
+    with rasterio.Env(**config):
+        with MosaicReader(src_path, threads=threads, manifest=manifest) as src_dst:
+            if zoom is None:
+                zoom = max(fp.minzoom for fp in src_dst.footprints.values())
+
+            footprint = src_dst.write_overview(
+                output, zoom, tilesize=tilesize, pixel_selection=pixel_selection
+            )
+
+            if manifest:
+                write_manifest(
+                    manifest,
+                    src_dst.tms.id,
+                    src_dst.footprints,
+                    overview={
+                        "path": os.path.relpath(
+                            os.path.abspath(output),
+                            os.path.dirname(os.path.abspath(manifest)),
+                        ),
+                        "footprint": footprint,
+                    },
+                )
+
+    click.echo(f"Overview (zoom {zoom}) written to {output}", err=True)
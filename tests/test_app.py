@@ -1,15 +1,27 @@
 """tests rio_viz.server."""
 
+import asyncio
 import json
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
+import morecantile
 import pytest
+from rasterio.env import getenv
+from rio_tiler.constants import WGS84_CRS
 from rio_tiler.io import COGReader
 from starlette.testclient import TestClient
 
-from rio_viz.app import viz
+from rio_viz.app import SETTINGS_ENV, create_app, viz
 from rio_viz.io.mosaic import MosaicReader
 from rio_viz.io.reader import MultiFilesAssetsReader, MultiFilesBandsReader
+from rio_viz.resources.enums import RasterFormat
+
+from titiler.core.utils import render_image
 
 cog_path = os.path.join(os.path.dirname(__file__), "fixtures", "cog.tif")
 cogb1b2b3_path = os.path.join(os.path.dirname(__file__), "fixtures", "cogb{1,2,3}.tif")
@@ -398,11 +410,26 @@ def test_viz_mosaic():
     assert response.headers["content-type"] == "image/png"
     assert response.headers["cache-control"] == "no-cache"
 
-    with pytest.raises(NotImplementedError):
-        client.get("/preview")
+    response = client.get(
+        "/tiles/WebMercatorQuad/8/75/91?rescale=1,10&pixel_selection=median"
+    )
+    assert response.status_code == 200
 
-    with pytest.raises(NotImplementedError):
-        client.get("/bbox/-2.00,48.5,-1,49.5.png")
+    response = client.get("/tiles/WebMercatorQuad/8/75/91?pixel_selection=unknown")
+    assert response.status_code == 422
+
+    response = client.get("/preview?rescale=1,10")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+    response = client.get("/bbox/-74,45.5,-73,46.5.png?rescale=1,10&max_size=128")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+    # Bbox is Outside COGs bounds
+    response = client.get("/bbox/-2.00,48.5,-1,49.5.png")
+    assert response.status_code == 500
+    assert "Method returned an empty array" in response.text
 
     # Point is Outside COGs bounds
     response = client.get("/point?coordinates=-2,48")
@@ -417,3 +444,572 @@ def test_viz_mosaic():
         "coordinates": [-72.63567185076337, 46.10493842126715],
         "values": [12453, 11437, 11360],
     }
+
+
+def test_viz_tile_cache():
+    """Should serve rendered tiles from the cache."""
+    app = viz(cog_path, reader=COGReader, tile_cache_size=10 * 1024 * 1024)
+    client = TestClient(app.app)
+
+    response = client.get("/cache")
+    assert response.status_code == 200
+    assert response.json()["hits"] == 0
+    assert response.json()["maxsize"] == 10 * 1024 * 1024
+
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&bidx=1")
+    assert response.status_code == 200
+    content = response.content
+
+    # Same tile with parameters in different order
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?bidx=1&rescale=1,10")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content == content
+
+    response = client.get(
+        "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&colormap_name=cfastie"
+    )
+    assert response.status_code == 200
+    assert response.content != content
+
+    stats = client.get("/cache").json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["count"] == 2
+
+    # Cache disabled
+    app = viz(cog_path, reader=COGReader)
+    client = TestClient(app.app)
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10")
+    assert response.status_code == 200
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10")
+    assert response.status_code == 200
+    assert client.get("/cache").json()["hits"] == 0
+
+
+def test_viz_single_flight():
+    """Should render identical concurrent requests only once."""
+    calls = []
+
+    def _render_image(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.5)
+        return render_image(*args, **kwargs)
+
+    app = viz(cog_path, reader=COGReader)
+    with patch("rio_viz.app.render_image", _render_image):
+        with TestClient(app.app) as client:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                responses = list(
+                    executor.map(
+                        client.get,
+                        [
+                            "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&bidx=1",
+                            "/tiles/WebMercatorQuad/7/64/43.png?bidx=1&rescale=1,10",
+                            "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&bidx=1",
+                            "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&bidx=1",
+                        ],
+                    )
+                )
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses}) == 1
+    assert len(calls) == 1
+    assert len(app.in_flight) == 0
+
+
+def test_viz_saturated():
+    """Should return 503 when the executor queue is full."""
+    app = viz(cog_path, reader=COGReader, threads=1, max_queue=0, retry_after=5)
+    with patch.object(
+        app.executor, "pending", app.executor.max_workers + app.executor.max_queue
+    ):
+        client = TestClient(app.app)
+        response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+        response = client.get("/info")
+        assert response.status_code == 503
+
+    response = client.get("/info")
+    assert response.status_code == 200
+
+    response = client.get("/executor")
+    assert response.status_code == 200
+    assert response.json()["rejected"] == 2
+    assert response.json()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_viz_worker_env():
+    """Should set GDAL config options in every worker thread."""
+    app = viz(
+        cog_path,
+        reader=COGReader,
+        threads=2,
+        config={"GDAL_CACHEMAX": 256, "VSI_CACHE": "TRUE"},
+    )
+    envs = await asyncio.gather(*[app.executor.run(getenv) for _ in range(4)])
+    for env in envs:
+        assert env["GDAL_CACHEMAX"] == 256
+        assert env["VSI_CACHE"] == "TRUE"
+
+    # Reader pool defaults to the number of threads
+    assert app.pool.max_size == 2
+
+
+@pytest.mark.asyncio
+async def test_viz_check_version_async():
+    """Should check the dataset files off the event loop, when due."""
+    app = viz(cog_path, reader=COGReader, dataset_check_interval=60)
+
+    threads = []
+
+    def get_version(src_path):
+        threads.append(threading.get_ident())
+        return ()
+
+    with patch("rio_viz.app.get_dataset_version", side_effect=get_version):
+        assert await app._check_version_async() == ()
+        assert threads and threads[0] != threading.get_ident()
+
+        # not due
+        await app._check_version_async()
+        assert len(threads) == 1
+
+
+def test_viz_metadata_cache(tmp_path):
+    """Should memoize dataset metadata until the dataset changes."""
+    src_path = str(tmp_path / "cog.tif")
+    shutil.copy(cog_path, src_path)
+
+    app = viz(src_path, reader=COGReader, dataset_check_interval=0)
+    client = TestClient(app.app)
+
+    response = client.get("/tilejson.json")
+    assert response.status_code == 200
+    tilejson = response.json()
+
+    response = client.get("/info")
+    assert response.status_code == 200
+
+    with patch.object(app.pool, "get") as pool_get:
+        response = client.get("/tilejson.json?rescale=1,10")
+        assert response.status_code == 200
+        assert response.json()["bounds"] == tilejson["bounds"]
+
+        response = client.get("/WMTSCapabilities.xml")
+        assert response.status_code == 200
+        assert "<ows:Identifier>7</ows:Identifier>" in response.text
+
+        response = client.get("/info")
+        assert response.status_code == 200
+
+        pool_get.assert_not_called()
+
+    # Replace the dataset
+    shutil.copy(cog_mosaic_path.replace("{1,2}", "1"), src_path)
+    os.utime(src_path, ns=(0, 0))
+
+    response = client.get("/tilejson.json")
+    assert response.status_code == 200
+    assert response.json()["bounds"] != tilejson["bounds"]
+
+
+def test_viz_precompute_statistics():
+    """Should compute and cache the viewer statistics at startup."""
+    app = viz(cogb1b2b3_path, reader=MultiFilesBandsReader, precompute_statistics=True)
+    with TestClient(app.app) as client:
+        while app._background_tasks:
+            time.sleep(0.05)
+
+        with patch.object(app.pool, "get") as pool_get:
+            response = client.get("/statistics?max_size=256")
+            assert response.status_code == 200
+            assert ["b1", "b2", "b3"] == list(response.json())
+            pool_get.assert_not_called()
+
+            # statistics of the rendered bands requested by the viewer
+            response = client.get("/statistics?max_size=256&bands=b3&bands=b1")
+            assert response.status_code == 200
+            assert ["b3", "b1"] == list(response.json())
+            pool_get.assert_not_called()
+
+            response = client.get("/statistics?bands=b1&max_size=256")
+            assert response.status_code == 200
+            pool_get.assert_not_called()
+
+    stats = app.metadata_cache.stats()
+    assert stats["count"] == 1
+    assert stats["hits"] == 3
+
+    app = viz(cogb1b2b3_path, reader=MultiFilesAssetsReader, precompute_statistics=True)
+    with TestClient(app.app) as client:
+        while app._background_tasks:
+            time.sleep(0.05)
+
+        with patch.object(app.pool, "get") as pool_get:
+            response = client.get("/statistics?max_size=256&assets=asset2")
+            assert response.status_code == 200
+            assert ["asset2"] == list(response.json())
+            pool_get.assert_not_called()
+
+
+def test_viz_create_app(monkeypatch):
+    """Should rebuild the application from settings."""
+    app = viz(
+        cogb1b2b3_path,
+        reader=MultiFilesBandsReader,
+        layers=("b1",),
+        nodata=0,
+        tile_cache_size=1024,
+    )
+    settings = app.settings()
+    assert settings["reader"] == "rio_viz.io.reader.MultiFilesBandsReader"
+
+    monkeypatch.setenv(SETTINGS_ENV, json.dumps(settings))
+    client = TestClient(create_app())
+
+    response = client.get("/statistics")
+    assert response.status_code == 200
+    assert ["b1"] == list(response.json())
+
+    response = client.get("/cache")
+    assert response.json()["maxsize"] == 1024
+
+
+def test_viz_settings_json():
+    """Should only require JSON serializable settings to start multiple workers."""
+    app = viz(
+        cog_mosaic_path,
+        reader=MosaicReader,
+        reader_params={"tms": morecantile.tms.get("WebMercatorQuad")},
+    )
+    client = TestClient(app.app)
+    response = client.get("/tiles/WebMercatorQuad/8/75/91?rescale=1,10")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+    with patch("rio_viz.app.uvicorn.run") as run:
+        app.start(workers=1)
+        run.assert_called_once()
+
+    with patch("rio_viz.app.uvicorn.run") as run:
+        with pytest.raises(ValueError, match="Setting `reader_params`"):
+            app.start(workers=2)
+        run.assert_not_called()
+
+    app = viz(cog_path, reader=COGReader, config={"GDAL_CACHEMAX": 256})
+    assert json.loads(app.settings_json()) == json.loads(json.dumps(app.settings()))
+
+
+def test_viz_etag(tmp_path):
+    """Should return 304 for matching If-None-Match without reading the dataset."""
+    src_path = str(tmp_path / "cog.tif")
+    shutil.copy(cog_path, src_path)
+
+    app = viz(
+        src_path,
+        reader=COGReader,
+        dataset_check_interval=0,
+        cache_control={"tiles": "public, max-age=3600"},
+    )
+    client = TestClient(app.app)
+
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    etag = response.headers["etag"]
+
+    with patch.object(app.pool, "get") as pool_get:
+        response = client.get(
+            "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        pool_get.assert_not_called()
+
+    # Same query parameters, in a different order
+    response = client.get("/tiles/WebMercatorQuad/7/64/43.png?bidx=1&rescale=1,10")
+    etag_bidx = response.headers["etag"]
+    response = client.get(
+        "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10&bidx=1",
+        headers={"If-None-Match": etag_bidx},
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag_bidx
+
+    # Different query parameters
+    response = client.get(
+        "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,20",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    response = client.get("/info", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    # No ETag for viewers and server endpoints
+    assert "etag" not in client.get("/").headers
+    assert "etag" not in client.get("/cache").headers
+
+    # No ETag on errors
+    response = client.get("/tiles/WebMercatorQuad/18/8624/119094.png")
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+    # Dataset changed
+    stat = os.stat(src_path)
+    os.utime(src_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    response = client.get(
+        "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_viz_etag_remote():
+    """Should not return ETags when the dataset version is unknown."""
+    app = viz(cog_path, reader=COGReader)
+    client = TestClient(app.app)
+
+    # e.g URLs are not checked and have an empty version
+    with patch("rio_viz.app.get_dataset_version", return_value=()):
+        response = client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10")
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+        response = client.get(
+            "/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10",
+            headers={"If-None-Match": "*"},
+        )
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+def test_viz_metrics():
+    """Should return requests and phases metrics."""
+    app = viz(cog_path, reader=COGReader)
+    client = TestClient(app.app)
+
+    assert (
+        client.get("/tiles/WebMercatorQuad/7/64/43.png?rescale=1,10").status_code == 200
+    )
+    assert client.get("/tiles/WebMercatorQuad/18/8624/119094.png").status_code == 404
+    assert client.get("/something").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    metrics = response.text
+    assert 'rio_viz_requests_total{route="tiles",method="GET",status="200"} 1' in metrics
+    assert 'rio_viz_requests_total{route="tiles",method="GET",status="404"} 1' in metrics
+    assert 'rio_viz_requests_total{route="other",method="GET",status="404"} 1' in metrics
+    assert 'rio_viz_request_duration_seconds_count{route="tiles"} 2' in metrics
+    assert 'rio_viz_response_size_bytes_count{route="tiles"} 2' in metrics
+    assert 'rio_viz_requests_in_flight{route="metrics"} 1' in metrics
+    for phase in ["open", "read", "render"]:
+        assert (
+            f'rio_viz_phase_duration_seconds_count{{route="tiles",phase="{phase}"}}'
+            in metrics
+        )
+    assert "rio_viz_tile_cache_hits 0" in metrics
+    assert "rio_viz_executor_completed" in metrics
+    assert "rio_viz_reader_pool_size 1" in metrics
+
+
+def test_viz_points():
+    """Should return the values of many points."""
+    client = TestClient(viz(cog_mosaic_path, reader=MosaicReader).app)
+
+    coordinates = [[-72.63567185076337, 46.10493842126715], [-75.5, 46], [-2, 48]]
+    response = client.post(
+        "/points", json={"type": "MultiPoint", "coordinates": coordinates}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["coordinates"] == coordinates
+    assert body["band_names"] == ["b1", "b2", "b3"]
+    assert body["values"][0] == [12453, 9489, None]
+
+    response = client.post(
+        "/points?pixel_selection=count",
+        json={
+            "type": "Feature",
+            "properties": {},
+            "geometry": {"type": "MultiPoint", "coordinates": coordinates},
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["values"] == [[1, 1, 0]]
+
+    # Simple Reader
+    client = TestClient(viz(cog_path, reader=COGReader).app)
+    with COGReader(cog_path) as cog:
+        lon, lat = cog.get_geographic_bounds(WGS84_CRS)[:2]
+        lon, lat = lon + 0.5, lat + 0.5
+        pt = cog.point(lon, lat)
+
+    response = client.post("/points?bidx=1", json={"coordinates": [[lon, lat], [0, 0]]})
+    assert response.status_code == 200
+    assert response.json()["values"] == [[pt.data[0].item(), None]]
+
+    # MultiBandReader
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesBandsReader).app)
+    response = client.post("/points", json={"coordinates": [[lon, lat], [0, 0]]})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["values"]) == 3
+    assert body["values"][0][1] is None
+    # each band file is opened once
+    assert response.headers["X-Files-Opened"] == "3"
+
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesAssetsReader).app)
+    response = client.post(
+        "/points?assets=asset2", json={"coordinates": [[lon, lat], [0, 0], [-2, 48]]}
+    )
+    assert response.status_code == 200
+    assert response.json()["band_names"] == ["asset2_b1"]
+    assert response.json()["values"][0][1] is None
+    assert response.headers["X-Files-Opened"] == "1"
+
+
+def test_viz_empty_tiles():
+    """Should answer the tiles outside the mosaic footprints without reading."""
+    client = TestClient(viz(cog_mosaic_path, reader=MosaicReader).app)
+
+    with patch.object(MosaicReader, "_mosaic_tile") as mosaic_tile:
+        response = client.get("/tiles/WebMercatorQuad/8/10/10.png")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Tile(x=10, y=10, z=8) is outside bounds"
+        mosaic_tile.assert_not_called()
+
+    client = TestClient(viz(cog_mosaic_path, reader=MosaicReader, empty_tiles="204").app)
+    response = client.get("/tiles/WebMercatorQuad/8/10/10.png")
+    assert response.status_code == 204
+    assert not response.content
+
+    response = client.get("/tiles/WebMercatorQuad/8/75/91?rescale=1,10")
+    assert response.status_code == 200
+
+    app = viz(cog_mosaic_path, reader=MosaicReader, empty_tiles="transparent")
+    client = TestClient(app.app)
+    response = client.get("/tiles/WebMercatorQuad/8/10/10.png")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+    # cached by format and tilesize
+    assert list(app._empty_tile_cache) == [(RasterFormat.png, 256)]
+    response = client.get("/tiles/WebMercatorQuad/8/10/10.png?tilesize=512")
+    assert response.status_code == 200
+    assert len(app._empty_tile_cache) == 2
+
+    response = client.get("/tiles/WebMercatorQuad/8/10/10")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+    response = client.get("/tiles/WebMercatorQuad/8/10/10.webp")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+
+    # formats without transparency
+    for ext in ["jpeg", "tif", "npy"]:
+        response = client.get(f"/tiles/WebMercatorQuad/8/10/10.{ext}")
+        assert response.status_code == 204
+        assert not response.content
+
+    # Simple reader
+    client = TestClient(viz(cog_path, reader=COGReader, empty_tiles="204").app)
+    assert client.get("/tiles/WebMercatorQuad/18/8624/119094.png").status_code == 204
+
+
+def test_viz_timeseries():
+    """Should return the points values of every file."""
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesAssetsReader).app)
+
+    with MultiFilesAssetsReader(cogb1b2b3_path) as src_dst:
+        expected = [
+            src_dst.point(-2.0, 48.0, assets=asset).array.tolist()
+            for asset in src_dst.assets
+        ]
+
+    response = client.get(
+        "/timeseries/point?coordinates=-2.0,48.0&coordinates=100.0,10.0"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["assets"] == ["asset1", "asset2", "asset3"]
+    assert body["band_names"] == ["b1"]
+    assert [values[0][0] for values in body["values"]] == [v[0] for v in expected]
+    # outside the files
+    assert [values[0][1] for values in body["values"]] == [None, None, None]
+
+    response = client.get(
+        "/timeseries/point?coordinates=-2.0,48.0&window=2&aggregation=max"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["windows"] == [["asset1", "asset2"], ["asset3"]]
+    assert body["values"] == [
+        [[max(expected[0][0], expected[1][0])]],
+        [[expected[2][0]]],
+    ]
+
+    response = client.get(
+        "/timeseries/point?coordinates=-2.0,48.0&assets=asset3&expression=b1*2"
+    )
+    assert response.status_code == 200
+    assert response.json()["band_names"] == ["b1*2"]
+    assert response.json()["values"] == [[[expected[2][0] * 2]]]
+
+    response = client.get("/timeseries/point?coordinates=-2.0,48.0&window=0")
+    assert response.status_code == 422
+
+    # Only for the readers with a `timeseries` method
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesBandsReader).app)
+    response = client.get("/timeseries/point?coordinates=-2.0,48.0")
+    assert response.status_code == 404
+
+
+def test_viz_files_opened():
+    """Should only open the files needed by the request and report them."""
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesBandsReader).app)
+
+    response = client.get("/point?coordinates=-2.0,48.0")
+    assert response.headers["X-Files-Opened"] == "3"
+
+    response = client.get("/point?coordinates=-2.0,48.0&expression=b1%2Bb2")
+    assert response.json()["band_names"] == ["b1+b2"]
+    assert response.headers["X-Files-Opened"] == "2"
+
+    client = TestClient(
+        viz(cogb1b2b3_path, reader=MultiFilesBandsReader, layers=["b3"]).app
+    )
+    response = client.get("/point?coordinates=-2.0,48.0")
+    assert response.json()["band_names"] == ["b3"]
+    assert response.headers["X-Files-Opened"] == "1"
+
+    # assets selected with `asset_bidx`
+    client = TestClient(viz(cogb1b2b3_path, reader=MultiFilesAssetsReader).app)
+    response = client.get("/point?coordinates=-2.0,48.0&asset_bidx=asset2|1")
+    assert response.json()["band_names"] == ["asset2_b1"]
+    assert response.headers["X-Files-Opened"] == "1"
+
+    # the dataset is only opened by the first request
+    client = TestClient(viz(cog_path).app)
+    response = client.get("/point?coordinates=-2.0,48.0")
+    assert response.headers["X-Files-Opened"] == "1"
+    response = client.get("/point?coordinates=-2.0,48.0")
+    assert response.headers["X-Files-Opened"] == "0"
+
+    # not reported for the requests not using a reader
+    response = client.get("/cache")
+    assert "X-Files-Opened" not in response.headers
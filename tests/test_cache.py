@@ -0,0 +1,79 @@
+"""tests rio_viz.cache."""
+
+import asyncio
+
+import pytest
+
+from rio_viz.cache import LRUCache, SingleFlight
+
+
+def test_lru_cache():
+    """Should evict least recently used values when over budget."""
+    cache = LRUCache(maxsize=10)
+
+    cache.set("a", b"aaaa", 4)
+    cache.set("b", b"bbbb", 4)
+    assert cache.get("a") == b"aaaa"
+    assert cache.currsize == 8
+
+    # `b` is the least recently used
+    cache.set("c", b"cccc", 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.currsize == 8
+
+    # Values bigger than the budget are not cached
+    cache.set("d", b"d" * 11, 11)
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+    # Replace value
+    cache.set("a", b"aa", 2)
+    assert cache.currsize == 6
+
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 2,
+        "count": 2,
+        "currsize": 6,
+        "maxsize": 10,
+    }
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.currsize == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    """Should share the result of identical in-flight calls."""
+    calls = []
+
+    async def _work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return b"tile"
+
+    in_flight = SingleFlight()
+    results = await asyncio.gather(*[in_flight.do("key", _work) for _ in range(5)])
+    assert results == [b"tile"] * 5
+    assert len(calls) == 1
+    assert len(in_flight) == 0
+
+    # Not in-flight anymore
+    assert await in_flight.do("key", _work) == b"tile"
+    assert len(calls) == 2
+
+    async def _error():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        raise ValueError("something went wrong")
+
+    calls = []
+    results = await asyncio.gather(
+        *[in_flight.do("key", _error) for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 1
+    assert len(in_flight) == 0
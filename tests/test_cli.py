@@ -1,11 +1,12 @@
 """tests rio_viz.server."""
 
+import json
 import os
 from unittest.mock import patch
 
 from click.testing import CliRunner
 
-from rio_viz.scripts.cli import viz
+from rio_viz.scripts.cli import mosaic, viz
 
 cog_path = os.path.join(os.path.dirname(__file__), "fixtures", "cog.tif")
 noncog_path = os.path.join(os.path.dirname(__file__), "fixtures", "noncog.tif")
@@ -23,6 +24,13 @@ def test_viz_valid(launch, app):
     runner = CliRunner()
     result = runner.invoke(viz, [cog_path])
     app.assert_called_once()
+    app.return_value.start.assert_called_once_with(workers=1)
+    assert not result.exception
+    assert result.exit_code == 0
+
+    app.reset_mock()
+    result = runner.invoke(viz, [cog_path, "--workers", "4"])
+    app.return_value.start.assert_called_once_with(workers=4)
     assert not result.exception
     assert result.exit_code == 0
 
@@ -40,3 +48,48 @@ def test_viz_invalidCog(launch, app):
     app.assert_called_once()
     assert not result.exception
     assert result.exit_code == 0
+
+
+def test_mosaic_manifest(tmp_path):
+    """Should create a manifest."""
+    src_path = os.path.join(os.path.dirname(__file__), "fixtures", "mosaic_cog{1,2}.tif")
+    output = str(tmp_path / "manifest.json")
+
+    runner = CliRunner()
+    result = runner.invoke(mosaic, ["manifest", src_path, "--output", output])
+    assert not result.exception
+    assert result.exit_code == 0
+    assert "2 datasets" in result.output
+
+    with open(output) as f:
+        manifest = json.load(f)
+    assert len(manifest["datasets"]) == 2
+
+    result = runner.invoke(mosaic, ["manifest", src_path, "-o", output, "--overwrite"])
+    assert result.exit_code == 0
+
+
+def test_mosaic_overview(tmp_path):
+    """Should create an overview and record it in the manifest."""
+    src_path = os.path.join(os.path.dirname(__file__), "fixtures", "mosaic_cog{1,2}.tif")
+    output = str(tmp_path / "overview.tif")
+    manifest = str(tmp_path / "manifest.json")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        mosaic,
+        ["overview", src_path, "-o", output, "--zoom", "6", "--manifest", manifest],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    assert "zoom 6" in result.output
+
+    with open(manifest) as f:
+        entry = json.load(f)["overview"]
+    assert entry["path"] == "overview.tif"
+    assert entry["footprint"]["maxzoom"] == 6
+
+    # Default to the highest datasets minzoom
+    result = runner.invoke(mosaic, ["overview", src_path, "-o", output])
+    assert result.exit_code == 0
+    assert "zoom 7" in result.output
@@ -0,0 +1,60 @@
+"""tests rio_viz.executor."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rio_viz.executor import BoundedExecutor, ExecutorSaturated, ExecutorTimeout
+
+
+@pytest.mark.asyncio
+async def test_executor():
+    """Should run tasks in the thread pool."""
+    executor = BoundedExecutor(max_workers=2)
+    results = await asyncio.gather(
+        *[executor.run(threading.current_thread) for _ in range(4)]
+    )
+    assert threading.current_thread() not in results
+    assert all(t.name.startswith("rio-viz") for t in results)
+
+    stats = executor.stats()
+    assert stats["completed"] == 4
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+    executor.shutdown(wait=True)
+    # Thread pool is re-created on demand
+    assert await executor.run(sum, [1, 2]) == 3
+
+
+@pytest.mark.asyncio
+async def test_executor_saturated():
+    """Should reject tasks when the queue is full."""
+    executor = BoundedExecutor(max_workers=1, max_queue=1, max_wait=None)
+
+    tasks = [asyncio.ensure_future(executor.run(time.sleep, 0.2)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(ExecutorSaturated):
+        await executor.run(time.sleep, 0.2)
+
+    await asyncio.gather(*tasks)
+    assert executor.rejected == 1
+    assert executor.completed == 2
+
+
+@pytest.mark.asyncio
+async def test_executor_timeout():
+    """Should give up on tasks waiting too long in the queue."""
+    executor = BoundedExecutor(max_workers=1, max_wait=0.1)
+
+    results = await asyncio.gather(
+        executor.run(time.sleep, 0.3),
+        executor.run(time.sleep, 0.01),
+        return_exceptions=True,
+    )
+    assert results[0] is None
+    assert isinstance(results[1], ExecutorTimeout)
+    assert executor.expired == 1
+    assert executor.pending == 0
@@ -0,0 +1,47 @@
+"""tests rio_viz.io.index."""
+
+import numpy
+import pytest
+
+from rio_viz.io.index import STRTree
+
+
+def _brute_force(bounds, bbox):
+    minx, miny, maxx, maxy = bbox
+    return [
+        ix
+        for ix, (bminx, bminy, bmaxx, bmaxy) in enumerate(bounds)
+        if bminx <= maxx and bmaxx >= minx and bminy <= maxy and bmaxy >= miny
+    ]
+
+
+@pytest.mark.parametrize("n", [0, 1, 15, 16, 17, 500])
+def test_strtree(n):
+    """Should return the same items as a brute force search."""
+    rng = numpy.random.default_rng(n)
+    x = rng.uniform(-180, 170, n)
+    y = rng.uniform(-90, 80, n)
+    size = rng.uniform(0, 10, (n, 2))
+    bounds = [(x[i], y[i], x[i] + size[i, 0], y[i] + size[i, 1]) for i in range(n)]
+
+    tree = STRTree(bounds)
+    assert len(tree) == n
+
+    for _ in range(50):
+        qx, qy = rng.uniform(-180, 180), rng.uniform(-90, 90)
+        bbox = (qx, qy, qx + rng.uniform(0, 20), qy + rng.uniform(0, 20))
+        assert tree.query(bbox) == _brute_force(bounds, bbox)
+
+    # Point
+    if n:
+        assert 0 in tree.query((x[0], y[0], x[0], y[0]))
+
+
+def test_strtree_antimeridian():
+    """Should handle footprints and queries crossing the antimeridian."""
+    tree = STRTree([(170, 0, -170, 10), (0, 0, 10, 10)])
+    assert tree.query((175, 1, 176, 2)) == [0]
+    assert tree.query((-175, 1, -174, 2)) == [0]
+    assert tree.query((5, 1, 6, 2)) == [1]
+    assert tree.query((179, 1, 6, 2)) == [0, 1]
+    assert tree.query((20, 1, 30, 2)) == []
@@ -0,0 +1,96 @@
+"""tests rio_viz.io.methods."""
+
+import numpy
+import pytest
+from rio_tiler.mosaic.methods.defaults import FirstMethod
+
+from rio_viz.io.methods import (
+    StreamingCountMethod,
+    StreamingMeanMethod,
+    StreamingMedianMethod,
+    StreamingStdevMethod,
+    get_pixel_selection,
+)
+
+
+@pytest.fixture
+def arrays():
+    """Random masked arrays."""
+    rng = numpy.random.default_rng(0)
+    return [
+        numpy.ma.MaskedArray(
+            rng.integers(0, 100, (2, 8, 8)).astype("uint8"),
+            mask=rng.random((2, 8, 8)) < 0.3,
+        )
+        for _ in range(20)
+    ]
+
+
+def test_streaming_methods(arrays):
+    """Should match the stacked computations."""
+    stack = numpy.ma.stack(arrays, axis=0)
+
+    method = StreamingMeanMethod(enforce_data_type=False)
+    for array in arrays:
+        method.feed(array)
+    numpy.testing.assert_allclose(method.data, numpy.ma.mean(stack, axis=0))
+
+    method = StreamingMeanMethod()
+    method.feed(arrays[0])
+    assert method.data.dtype == "uint8"
+
+    method = StreamingStdevMethod()
+    for array in arrays:
+        method.feed(array)
+    numpy.testing.assert_allclose(method.data, numpy.ma.std(stack, axis=0))
+
+    method = StreamingCountMethod()
+    for array in arrays:
+        method.feed(array)
+    assert method.data.dtype == "uint8"
+    numpy.testing.assert_array_equal(method.data, numpy.ma.count(stack, axis=0)[0])
+
+    # Exact median for up to `exact` datasets
+    method = StreamingMedianMethod(enforce_data_type=False)
+    for array in arrays:
+        method.feed(array)
+    numpy.testing.assert_array_equal(method.data, numpy.ma.median(stack, axis=0))
+
+    # Exact median when the number of values is lower than the depth
+    method = StreamingMedianMethod(depth=32, exact=0, enforce_data_type=False)
+    for array in arrays:
+        method.feed(array)
+    numpy.testing.assert_array_equal(method.data, numpy.ma.median(stack, axis=0))
+
+    # Bounded buffers, once there are more than `exact` datasets
+    method = StreamingMedianMethod(depth=3, exact=5)
+    for array in arrays:
+        method.feed(array)
+    assert method._stack is None
+    assert len(method._levels) <= 3
+    assert method.data.dtype == "uint8"
+    assert method.data.shape == (2, 8, 8)
+    assert (method.data >= stack.min(axis=0)).all()
+    assert (method.data <= stack.max(axis=0)).all()
+
+    # Fully masked pixel
+    method = StreamingMedianMethod()
+    method.feed(numpy.ma.MaskedArray([1, 2], mask=[False, True]))
+    method.feed(numpy.ma.MaskedArray([3, 4], mask=[False, True]))
+    assert method.data.tolist() == [2, None]
+
+    with pytest.raises(ValueError):
+        StreamingMedianMethod(depth=1)
+
+
+def test_get_pixel_selection():
+    """Should return a new method instance."""
+    assert isinstance(get_pixel_selection(), FirstMethod)
+    assert isinstance(get_pixel_selection("mean"), StreamingMeanMethod)
+    assert get_pixel_selection("median", median_depth=5).depth == 5
+
+    method = StreamingCountMethod()
+    assert get_pixel_selection(method) is method
+
+    with pytest.raises(ValueError):
+        get_pixel_selection("unknown")
@@ -0,0 +1,47 @@
+"""tests rio_viz.metrics."""
+
+from rio_viz.metrics import Counter, Histogram, Metrics, timer
+
+
+def test_histogram():
+    """Should render cumulative buckets."""
+    hist = Histogram("latency", "Latency.", buckets=(0.1, 1))
+    hist.observe(0.05, route="tiles")
+    hist.observe(0.5, route="tiles")
+    hist.observe(5, route="tiles")
+
+    assert hist.render() == [
+        "# HELP latency Latency.",
+        "# TYPE latency histogram",
+        'latency_bucket{route="tiles",le="0.1"} 1',
+        'latency_bucket{route="tiles",le="1.0"} 2',
+        'latency_bucket{route="tiles",le="+Inf"} 3',
+        'latency_sum{route="tiles"} 5.55',
+        'latency_count{route="tiles"} 3',
+    ]
+
+
+def test_counter():
+    """Should escape label values."""
+    counter = Counter("requests", "Requests.")
+    counter.inc(route='"a"')
+    counter.inc(2, route='"a"')
+    assert counter.samples() == ['requests{route="\\"a\\""} 3']
+
+
+def test_metrics_timer():
+    """Should record phases only within a request."""
+    metrics = Metrics()
+    metrics.register("cache", "Cache", lambda: {"hits": 1, "max_wait": None})
+
+    with timer("read"):
+        pass
+
+    with metrics.bind("tiles"):
+        with timer("read"):
+            pass
+
+    output = metrics.render()
+    assert 'rio_viz_phase_duration_seconds_count{route="tiles",phase="read"} 1' in output
+    assert "cache_hits 1" in output
+    assert "cache_max_wait" not in output
@@ -0,0 +1,364 @@
+"""tests rio_viz.io.mosaic."""
+
+import os
+import shutil
+from unittest.mock import patch
+
+import numpy
+import pytest
+from rio_tiler.errors import EmptyMosaicError
+from rio_tiler.io import COGReader
+
+from rio_viz.io import MosaicReader
+from rio_viz.io.manifest import Footprint, read_manifest, write_manifest
+from rio_viz.io.mosaic import DatasetCache
+
+cog_mosaic_path = os.path.join(
+    os.path.dirname(__file__), "fixtures", "mosaic_cog{1,2}.tif"
+)
+cog1 = os.path.join(os.path.dirname(__file__), "fixtures", "mosaic_cog1.tif")
+cog2 = os.path.join(os.path.dirname(__file__), "fixtures", "mosaic_cog2.tif")
+
+
+def test_mosaic_index():
+    """Should only read the datasets intersecting the tile or point."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        assert len(src_dst.index) == 2
+        assert src_dst.assets_for_tile(75, 91, 8) == [cog1, cog2]
+        assert src_dst.assets_for_tile(148, 182, 9) == [cog1]
+        assert src_dst.assets_for_tile(154, 182, 9) == [cog2]
+        assert src_dst.assets_for_tile(0, 0, 9) == []
+
+        # datasets are opened on demand
+        assert len(src_dst.handles) == 0
+
+        img = src_dst.tile(148, 182, 9)
+        assert img.assets == [cog1]
+        assert cog1 in src_dst.handles
+        assert cog2 not in src_dst.handles
+
+        img = src_dst.tile(75, 91, 8, reverse=True)
+        assert img.assets[0] == cog2
+
+        with pytest.raises(EmptyMosaicError):
+            src_dst.tile(0, 0, 9)
+
+        assert src_dst.point(-75.8, 46).assets == [cog1]
+        assert src_dst.assets_for_point(-71.5, 46) == [cog2]
+
+        with pytest.raises(EmptyMosaicError):
+            src_dst.point(-2, 48)
+
+
+def test_mosaic_threads():
+    """Should read datasets in parallel and stop when the tile is filled."""
+    with MosaicReader(cog_mosaic_path, threads="2") as src_dst:
+        assert src_dst.threads == 2
+
+        img = src_dst.tile(75, 91, 8)
+        assert img.assets == [cog1, cog2]
+
+        assert src_dst.point(-75.8, 46).assets == [cog1]
+
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        ref = src_dst.tile(75, 91, 8)
+        numpy.testing.assert_array_equal(img.array, ref.array)
+
+    # Tile fully covered by the first dataset
+    with MosaicReader(cog_mosaic_path, threads=1) as src_dst:
+        assert src_dst.assets_for_tile(302, 364, 10) == [cog1, cog2]
+        img = src_dst.tile(302, 364, 10)
+        assert img.assets == [cog1]
+        assert cog2 not in src_dst.handles
+
+
+def test_mosaic_handles():
+    """Should keep at most `max_open` datasets opened."""
+    with MosaicReader(cog_mosaic_path, max_open="1") as src_dst:
+        assert src_dst.footprints[cog1].count == 3
+        assert src_dst.footprints[cog1].dtype == "uint16"
+        # datasets opened to get their footprints
+        assert src_dst.files_opened.pop() == 2
+
+        img = src_dst.tile(75, 91, 8)
+        assert img.assets == [cog1, cog2]
+        assert len(src_dst.handles) == 1
+        assert cog2 in src_dst.handles
+        assert src_dst.files_opened.pop() == 2
+
+        # cog1 was closed, then cog2 is closed to open cog1 again
+        src_dst.tile(75, 91, 8)
+        assert src_dst.files_opened.pop() == 2
+
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        src_dst.files_opened.pop()
+        src_dst.tile(75, 91, 8)
+        assert src_dst.files_opened.pop() == 2
+
+        # datasets are still opened
+        src_dst.tile(75, 91, 8)
+        assert src_dst.files_opened.pop() == 0
+
+    assert len(src_dst.handles) == 0
+
+
+def test_dataset_cache():
+    """Should not close datasets being read."""
+    cache = DatasetCache(COGReader, maxsize=1)
+
+    with cache.get(cog1) as src1:
+        with cache.get(cog1) as src:
+            assert src is src1
+
+        with cache.get(cog2) as src2:
+            # cog1 was evicted but is still being read
+            assert cog1 not in cache
+            assert not src1.dataset.closed
+
+        assert not src2.dataset.closed
+
+    assert src1.dataset.closed
+
+    with cache.get(cog1) as src:
+        assert src is not src1
+
+    assert src2.dataset.closed
+    assert len(cache) == 1
+
+    cache.clear()
+    assert src.dataset.closed
+    assert len(cache) == 0
+
+
+def test_mosaic_manifest(tmp_path):
+    """Should load footprints from the manifest and update outdated entries."""
+    for name in ["mosaic_cog1.tif", "mosaic_cog2.tif"]:
+        shutil.copy(os.path.join(os.path.dirname(__file__), "fixtures", name), tmp_path)
+
+    src_path = str(tmp_path / "mosaic_cog{1,2}.tif")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+        footprints = src_dst.footprints
+
+    manifest = read_manifest(manifest_path)
+    assert manifest["tms"] == "WebMercatorQuad"
+    assert manifest["datasets"] == footprints
+    assert footprints[str(tmp_path / "mosaic_cog1.tif")].mtime
+
+    # Footprints are read from the manifest
+    with patch("rio_viz.io.mosaic.scan") as scan:
+        with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+            assert src_dst.footprints == footprints
+            assert src_dst.bounds == [
+                -75.98703377413769,
+                44.93504283293787,
+                -71.33760472399901,
+                47.09685599202326,
+            ]
+            img = src_dst.tile(75, 91, 8)
+            assert img.assets == list(footprints)
+
+        scan.assert_not_called()
+
+    # Only the modified file is read again
+    cog2 = str(tmp_path / "mosaic_cog2.tif")
+    stat = os.stat(cog2)
+    os.utime(cog2, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    with patch(
+        "rio_viz.io.manifest.Footprint.from_reader", wraps=Footprint.from_reader
+    ) as from_reader:
+        with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+            assert from_reader.call_count == 1
+            assert src_dst.footprints[cog2].mtime == stat.st_mtime_ns + 1_000_000_000
+
+    assert read_manifest(manifest_path)["datasets"][cog2].mtime == (
+        stat.st_mtime_ns + 1_000_000_000
+    )
+
+
+def test_mosaic_manifest_overview(tmp_path):
+    """Should record the overview in the manifest."""
+    for name in ["mosaic_cog1.tif", "mosaic_cog2.tif"]:
+        shutil.copy(os.path.join(os.path.dirname(__file__), "fixtures", name), tmp_path)
+
+    src_path = str(tmp_path / "mosaic_cog{1,2}.tif")
+    manifest_path = str(tmp_path / "manifest.json")
+    overview = str(tmp_path / "overview.tif")
+
+    with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+        footprint = src_dst.write_overview(overview, 6)
+        write_manifest(
+            manifest_path,
+            src_dst.tms.id,
+            src_dst.footprints,
+            overview={"path": "overview.tif", "footprint": footprint},
+        )
+
+    with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+        assert src_dst.overview == overview
+        assert src_dst.overview_footprint == footprint
+        assert src_dst.tile(18, 22, 6).assets == [overview]
+
+    # The overview is outdated when datasets changed
+    cog2 = str(tmp_path / "mosaic_cog2.tif")
+    stat = os.stat(cog2)
+    os.utime(cog2, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    with pytest.warns(UserWarning):
+        with MosaicReader(src_path, manifest=manifest_path) as src_dst:
+            assert src_dst.overview is None
+
+    assert not read_manifest(manifest_path).get("overview")
+
+
+def test_mosaic_statistics():
+    """Should return statistics of all the datasets."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        stats = src_dst.statistics(max_size=256)
+        assert list(stats) == ["b1", "b2", "b3"]
+
+        # Cached
+        assert src_dst.statistics(max_size=256) is stats
+
+        counts = []
+        for path in [cog1, cog2]:
+            with src_dst.handles.get(path) as cog:
+                dataset_stats = cog.statistics(max_size=256)["b1"]
+                counts.append(dataset_stats.count)
+                assert stats["b1"].min <= dataset_stats.min
+                assert stats["b1"].max >= dataset_stats.max
+
+        assert stats["b1"].count == sum(counts)
+        assert sum(stats["b1"].histogram[0]) == sum(counts)
+
+        stats = src_dst.statistics(max_size=128, indexes=1, percentiles=[50])
+        assert list(stats) == ["b1"]
+        assert stats["b1"].percentile_50 == stats["b1"].median
+
+
+def test_mosaic_part():
+    """Should only read the intersecting datasets, at the output size."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        img = src_dst.preview(max_size=128)
+        assert max(img.width, img.height) == 128
+        assert img.crs == "epsg:4326"
+        assert img.assets == [cog1, cog2]
+
+        # Only cog1 is opened
+        src_dst.handles.clear()
+        img = src_dst.part((-76, 45.5, -75.5, 46.5), width=100, height=50)
+        assert (img.width, img.height) == (100, 50)
+        assert img.assets == [cog1]
+        assert cog1 in src_dst.handles
+        assert cog2 not in src_dst.handles
+
+        img = src_dst.part(
+            (-8400000, 5700000, -8100000, 5900000),
+            bounds_crs="epsg:3857",
+            max_size=64,
+        )
+        assert img.crs == "epsg:3857"
+        assert (img.width, img.height) == (64, 43)
+
+        with pytest.raises(EmptyMosaicError):
+            src_dst.part((-2, 48.5, -1, 49.5))
+
+        feat = {
+            "type": "Feature",
+            "properties": {},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[-74, 45.5], [-73, 45.5], [-73.5, 46.5], [-74, 45.5]]],
+            },
+        }
+        img = src_dst.feature(feat, max_size=64)
+        assert (img.width, img.height) == (64, 64)
+        assert img.cutline_mask is not None
+        # pixels outside the triangle are masked
+        assert img.mask[0, 0] == 0
+        assert img.mask[0, -1] == 0
+
+
+def test_mosaic_pixel_selection():
+    """Should combine the datasets with the pixel selection method."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        first = src_dst.tile(75, 91, 8)
+        assert first.metadata["mosaic_method"] == "FirstMethod"
+
+        img = src_dst.tile(75, 91, 8, pixel_selection="count")
+        assert img.count == 1
+        assert img.data.max() == 2
+
+        img = src_dst.tile(75, 91, 8, pixel_selection="mean")
+        assert img.metadata["mosaic_method"] == "StreamingMeanMethod"
+        assert img.assets == [cog1, cog2]
+
+        img = src_dst.tile(75, 91, 8, pixel_selection="median")
+        assert img.metadata["mosaic_method"] == "StreamingMedianMethod"
+
+        pt = src_dst.point(
+            -72.63567185076337, 46.10493842126715, pixel_selection="highest"
+        )
+        assert pt.metadata["mosaic_method"] == "HighestMethod"
+
+
+def test_mosaic_zoom_filter():
+    """Should skip the datasets outside their zoom range."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        assert src_dst.minzoom == 7
+        assert src_dst.maxzoom == 9
+
+        assert src_dst.assets_for_tile(37, 45, 7) == [cog1, cog2]
+        # Below the datasets minzoom
+        assert src_dst.assets_for_tile(18, 22, 6) == []
+        with pytest.raises(EmptyMosaicError):
+            src_dst.tile(18, 22, 6)
+
+        # Over-zooming past the mosaic maxzoom
+        assert src_dst.assets_for_tile(302, 364, 10) == [cog1, cog2]
+
+
+def test_mosaic_overview(tmp_path):
+    """Should read the low zoom tiles from the overview."""
+    overview = str(tmp_path / "overview.tif")
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        footprint = src_dst.write_overview(overview, 6)
+        assert footprint.maxzoom == 6
+        assert footprint.nodata is None
+
+    with MosaicReader(cog_mosaic_path, overview=overview) as src_dst:
+        assert src_dst.minzoom == footprint.minzoom
+        assert src_dst.overview_maxzoom == 6
+
+        img = src_dst.tile(18, 22, 6)
+        assert img.assets == [overview]
+        assert img.mask.any()
+
+        img = src_dst.tile(37, 45, 7)
+        assert img.assets == [cog1, cog2]
+
+        with pytest.raises(EmptyMosaicError):
+            src_dst.tile(0, 0, 3)
+
+    with MosaicReader(cog_mosaic_path, overview=overview, overview_maxzoom=5) as src_dst:
+        with pytest.raises(EmptyMosaicError):
+            src_dst.tile(18, 22, 6)
+
+
+def test_mosaic_tile_exists(tmp_path):
+    """Should check the tiles with the spatial index."""
+    with MosaicReader(cog_mosaic_path) as src_dst:
+        assert src_dst.tile_exists(75, 91, 8)
+        assert not src_dst.tile_exists(10, 10, 8)
+        # Outside the datasets zoom range
+        assert not src_dst.tile_exists(18, 22, 6)
+        assert not len(src_dst.handles)
+
+        overview = str(tmp_path / "overview.tif")
+        src_dst.write_overview(overview, 6)
+
+    with MosaicReader(cog_mosaic_path, overview=overview) as src_dst:
+        assert src_dst.tile_exists(18, 22, 6)
+        assert not src_dst.tile_exists(0, 0, 6)
@@ -0,0 +1,68 @@
+"""tests rio_viz.io.points."""
+
+import os
+
+import numpy
+import pytest
+from rio_tiler.constants import WGS84_CRS
+from rio_tiler.io import COGReader
+
+from rio_viz.io.points import aggregate_windows, read_points
+
+cog_path = os.path.join(os.path.dirname(__file__), "fixtures", "cog.tif")
+
+
+def test_read_points():
+    """Should return the same values as `Reader.point`."""
+    with COGReader(cog_path) as cog:
+        minx, miny, maxx, maxy = cog.get_geographic_bounds(WGS84_CRS)
+        lons = numpy.linspace(minx, maxx, 12)[1:-1]
+        lats = numpy.linspace(miny, maxy, 12)[1:-1]
+
+        values, band_names = read_points(cog, lons, lats)
+        assert values.shape == (cog.dataset.count, 10)
+        assert band_names == [f"b{ix + 1}" for ix in range(cog.dataset.count)]
+        for ix, (lon, lat) in enumerate(zip(lons, lats)):
+            pt = cog.point(lon, lat)
+            numpy.testing.assert_array_equal(values[:, ix], pt.array)
+
+        # Outside points are masked
+        values, _ = read_points(cog, [0, lons[0]], [0, lats[0]], indexes=1)
+        assert values.mask.tolist() == [[True, False]]
+
+        values, band_names = read_points(cog, lons, lats, expression="b1*2")
+        assert band_names == ["b1*2"]
+        numpy.testing.assert_array_equal(
+            values[0], read_points(cog, lons, lats, indexes=1)[0][0] * 2
+        )
+
+        values, _ = read_points(cog, lons, lats, indexes=1, nodata=values[0, 0] // 2)
+        assert values.mask[0, 0]
+
+
+def test_aggregate_windows():
+    """Should aggregate consecutive values and ignore the masked ones."""
+    values = numpy.ma.MaskedArray(
+        numpy.arange(10).reshape(5, 1, 2), mask=numpy.zeros((5, 1, 2), dtype=bool)
+    )
+    values[1, 0, 0] = numpy.ma.masked
+
+    mean = aggregate_windows(values, 2)
+    assert mean.shape == (3, 1, 2)
+    assert mean.tolist() == [[[0.0, 2.0]], [[5.0, 6.0]], [[8.0, 9.0]]]
+
+    assert aggregate_windows(values, 2, "min").tolist() == [[[0, 1]], [[4, 5]], [[8, 9]]]
+    assert aggregate_windows(values, 5, "max").tolist() == [[[8, 9]]]
+
+    values[4] = numpy.ma.masked
+    assert aggregate_windows(values, 2, "max").tolist() == [
+        [[0, 3]],
+        [[6, 7]],
+        [[None, None]],
+    ]
+
+    with pytest.raises(ValueError):
+        aggregate_windows(values, 0)
+
+    with pytest.raises(ValueError):
+        aggregate_windows(values, 2, "median")
@@ -0,0 +1,161 @@
+"""tests rio_viz.pool."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from rio_tiler.errors import TileOutsideBounds
+from rio_tiler.io import Reader
+
+from rio_viz.io import MosaicReader, MultiFilesAssetsReader, MultiFilesBandsReader
+from rio_viz.pool import ReaderPool
+
+cog_path = os.path.join(os.path.dirname(__file__), "fixtures", "cog.tif")
+cogb1b2b3_path = os.path.join(os.path.dirname(__file__), "fixtures", "cogb{1,2,3}.tif")
+cog_mosaic_path = os.path.join(
+    os.path.dirname(__file__), "fixtures", "mosaic_cog{1,2}.tif"
+)
+
+
+@pytest.mark.parametrize(
+    "reader,src_path",
+    [
+        (Reader, cog_path),
+        (MultiFilesBandsReader, cogb1b2b3_path),
+        (MultiFilesAssetsReader, cogb1b2b3_path),
+        (MosaicReader, cog_mosaic_path),
+    ],
+)
+def test_pool_reuse(reader, src_path):
+    """Should re-use the same reader between leases."""
+    pool = ReaderPool(reader, src_path)
+
+    with pool.get() as src_dst:
+        first = src_dst
+        assert src_dst.info()
+
+    with pool.get() as src_dst:
+        assert src_dst is first
+
+    assert len(pool) == 1
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_pool_overflow():
+    """Should create temporary readers when the pool is full."""
+    pool = ReaderPool(Reader, cog_path, max_size=1)
+
+    with pool.get() as src1:
+        with pool.get() as src2:
+            assert src1 is not src2
+            assert len(pool) == 1
+
+        # temporary reader is closed on release
+        assert src2.dataset.closed
+        assert not src1.dataset.closed
+
+    assert len(pool) == 1
+
+    # No pooling
+    pool = ReaderPool(Reader, cog_path, max_size=0)
+    with pool.get() as src_dst:
+        pass
+    assert src_dst.dataset.closed
+    assert len(pool) == 0
+
+
+def test_pool_errors():
+    """Should keep reader on rio-tiler errors and discard it on other errors."""
+    pool = ReaderPool(Reader, cog_path)
+
+    with pytest.raises(TileOutsideBounds):
+        with pool.get() as src_dst:
+            src_dst.tile(0, 0, 20)
+
+    assert len(pool) == 1
+    assert not src_dst.dataset.closed
+
+    with pytest.raises(ValueError):
+        with pool.get() as src_dst:
+            raise ValueError("something went wrong")
+
+    assert len(pool) == 0
+    assert src_dst.dataset.closed
+
+
+def test_pool_idle():
+    """Should close idle readers."""
+    pool = ReaderPool(Reader, cog_path, max_idle=0.01)
+
+    with pool.get() as src1:
+        pass
+
+    time.sleep(0.05)
+
+    with pool.get() as src2:
+        assert src1 is not src2
+        assert src1.dataset.closed
+
+    assert len(pool) == 1
+
+
+def test_pool_threads():
+    """Should close readers from any thread."""
+    pool = ReaderPool(MosaicReader, cog_mosaic_path)
+
+    def _read():
+        with pool.get() as src_dst:
+            return src_dst.tile(75, 91, 8)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda _: _read(), range(4)))
+
+    assert all(img.count == 3 for img in results)
+    assert 1 <= len(pool) <= 2
+
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_pool_thread_affinity():
+    """Should lease the reader last used by the same thread."""
+    pool = ReaderPool(Reader, cog_path)
+
+    def _get():
+        with pool.get() as src_dst:
+            return src_dst
+
+    with pool.get() as src1:
+        with pool.get() as src2:
+            pass
+
+    # src1 is the most recently returned reader
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(_get).result() is src1
+
+        # src1 is now tagged with the executor thread
+        assert _get() is src2
+        assert executor.submit(_get).result() is src1
+
+
+def test_pool_clear():
+    """Should close all readers, including leased ones when released."""
+    pool = ReaderPool(Reader, cog_path)
+
+    with pool.get() as src1:
+        with pool.get() as src2:
+            pass
+
+        pool.clear()
+        assert src2.dataset.closed
+        assert not src1.dataset.closed
+        assert len(pool) == 0
+
+    assert src1.dataset.closed
+
+    with pool.get() as src_dst:
+        assert src_dst not in [src1, src2]
+
+    assert len(pool) == 1
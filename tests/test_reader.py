@@ -0,0 +1,226 @@
+"""tests rio_viz.io.reader."""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy
+import pytest
+import rasterio
+from rasterio.env import get_gdal_config
+from rio_tiler import tasks
+from rio_tiler.constants import WGS84_CRS
+from rio_tiler.errors import InvalidBandName
+from rio_tiler.io import Reader
+
+from rio_viz.io import MultiFilesAssetsReader, MultiFilesBandsReader, reader
+
+cogb1b2b3_path = os.path.join(os.path.dirname(__file__), "fixtures", "cogb{1,2,3}.tif")
+
+
+def test_bands_reader_threads():
+    """Should read the band files with `threads` threads."""
+    with (
+        patch("rio_tiler.io.base.multi_arrays", wraps=tasks.multi_arrays) as multi_arrays,
+        patch("rio_tiler.io.base.multi_values", wraps=tasks.multi_values) as multi_values,
+    ):
+        with MultiFilesBandsReader(cogb1b2b3_path, threads=3) as src_dst:
+            img = src_dst.preview(bands=src_dst.bands, max_size=64)
+            assert img.band_names == ["b1", "b2", "b3"]
+            assert multi_arrays.call_args.kwargs["threads"] == 3
+
+            img = src_dst.tile(
+                *src_dst.tms.tile(
+                    *src_dst.get_geographic_bounds(WGS84_CRS)[:2], src_dst.maxzoom
+                ),
+                bands=["b1", "b3"],
+            )
+            assert img.band_names == ["b1", "b3"]
+            assert multi_arrays.call_args.kwargs["threads"] == 3
+
+            info = src_dst.info(bands=src_dst.bands)
+            assert len(info.band_metadata) == 3
+            assert multi_values.call_args.kwargs["threads"] == 3
+
+        # Files read one after another
+        with MultiFilesBandsReader(cogb1b2b3_path, threads="0") as src_dst:
+            assert src_dst.threads == 0
+            with patch("rio_tiler.tasks.futures.ThreadPoolExecutor") as executor:
+                img = src_dst.preview(expression="b1+b2", max_size=64)
+                executor.assert_not_called()
+
+            assert img.band_names == ["b1+b2"]
+
+
+def test_reader_reference_cache():
+    """Should open the reference file once per input, tms and options."""
+    reader._reference_cache.clear()
+    with patch.object(
+        Reader,
+        "__attrs_post_init__",
+        autospec=True,
+        side_effect=Reader.__attrs_post_init__,
+    ) as opener:
+        with MultiFilesBandsReader(cogb1b2b3_path) as src_dst:
+            assert src_dst.bands == ["b1", "b2", "b3"]
+            assert src_dst._get_band_url("b2").endswith("cogb2.tif")
+            with pytest.raises(InvalidBandName):
+                src_dst._get_band_url("b4")
+
+        with MultiFilesBandsReader(cogb1b2b3_path) as src_dst:
+            assert src_dst.minzoom is not None
+
+        assert opener.call_count == 1
+
+        with MultiFilesAssetsReader(cogb1b2b3_path) as src_dst:
+            assert src_dst.assets == ["asset1", "asset2", "asset3"]
+            assert src_dst._get_asset_info("asset3")["url"].endswith("cogb3.tif")
+            with pytest.raises(InvalidBandName):
+                src_dst._get_asset_info("b1")
+
+        assert opener.call_count == 2
+
+        with MultiFilesBandsReader(
+            cogb1b2b3_path, reader_options={"options": {"nodata": 0}}
+        ):
+            pass
+
+        assert opener.call_count == 3
+
+
+def test_bands_reader_stack(tmp_path):
+    """Should read the bands from one stacked VRT when the files share a grid."""
+    with MultiFilesBandsReader(cogb1b2b3_path) as src_dst:
+        tile = src_dst.tms.tile(
+            *src_dst.get_geographic_bounds(WGS84_CRS)[:2], src_dst.maxzoom
+        )
+        img = src_dst.tile(*tile, bands=["b1", "b3"])
+        expr = src_dst.preview(expression="b1+b2", max_size=64)
+        pt = src_dst.point(-2.0, 48.0, bands=src_dst.bands)
+
+    with MultiFilesBandsReader(cogb1b2b3_path, stack="true") as src_dst:
+        assert src_dst._stack is not None
+        with patch("rio_tiler.io.base.multi_arrays") as multi_arrays:
+            stacked = src_dst.tile(*tile, bands=["b1", "b3"])
+            multi_arrays.assert_not_called()
+
+        assert stacked.band_names == ["b1", "b3"]
+        numpy.testing.assert_array_equal(stacked.array, img.array)
+
+        stacked = src_dst.preview(expression="b1+b2", max_size=64)
+        assert stacked.band_names == ["b1+b2"]
+        numpy.testing.assert_array_equal(stacked.array, expr.array)
+
+        stacked = src_dst.point(-2.0, 48.0, bands=src_dst.bands)
+        assert stacked.band_names == ["b1", "b2", "b3"]
+        assert stacked.array.tolist() == pt.array.tolist()
+
+        with pytest.raises(InvalidBandName):
+            src_dst.tile(*tile, bands=["b4"])
+
+    # Files with different grids are read separately
+    with rasterio.open(cogb1b2b3_path.replace("{1,2,3}", "1")) as src:
+        profile = src.profile
+        data = src.read(window=((0, 100), (0, 100)))
+
+    profile.update(
+        width=100,
+        height=100,
+        tiled=False,
+        transform=src.window_transform(((0, 100), (0, 100))),
+    )
+    for name in ["b1", "b2"]:
+        with rasterio.open(tmp_path / f"{name}.tif", "w", **profile) as dst:
+            dst.write(data)
+
+    with rasterio.open(tmp_path / "b3.tif", "w", **{**profile, "width": 50}) as dst:
+        dst.write(data[:, :, :50])
+
+    with MultiFilesBandsReader(str(tmp_path / "b{1,2}.tif"), stack=True) as src_dst:
+        assert src_dst._stack is not None
+
+    with MultiFilesBandsReader(str(tmp_path / "b{1,2,3}.tif"), stack=True) as src_dst:
+        assert src_dst._stack is None
+        img = src_dst.point(-2.999, 49.999, bands=src_dst.bands)
+        assert img.band_names == ["b1", "b2", "b3"]
+
+
+def test_readers_points():
+    """Should read each file once for all the points."""
+    coords = [(-2.0, 48.0), (-1.0, 49.5), (10.0, 10.0)]
+    xs = [x for x, _ in coords]
+    ys = [y for _, y in coords]
+
+    for stack in [False, True]:
+        with MultiFilesBandsReader(cogb1b2b3_path, stack=stack) as src_dst:
+            expected = [src_dst.point(x, y, bands=src_dst.bands) for x, y in coords[:2]]
+            src_dst.files_opened.pop()
+
+            values, band_names = src_dst.points(xs, ys, bands=src_dst.bands)
+            assert band_names == ["b1", "b2", "b3"]
+            assert src_dst.files_opened.pop() == 3
+            for ix, pt in enumerate(expected):
+                assert values[:, ix].tolist() == pt.array.tolist()
+            assert values[:, 2].mask.all()
+
+            values, band_names = src_dst.points(xs, ys, expression="b1+b2")
+            assert band_names == ["b1+b2"]
+            assert values[0, 0] == expected[0].array[0] + expected[0].array[1]
+
+    with MultiFilesAssetsReader(cogb1b2b3_path) as src_dst:
+        pt = src_dst.point(-2.0, 48.0, assets=["asset1", "asset3"])
+        src_dst.files_opened.pop()
+
+        values, band_names = src_dst.points(xs, ys, assets=["asset1", "asset3"])
+        assert band_names == pt.band_names == ["asset1_b1", "asset3_b1"]
+        assert values[:, 0].tolist() == pt.array.tolist()
+        assert values[:, 2].mask.all()
+        assert src_dst.files_opened.pop() == 2
+
+        values, band_names = src_dst.points(
+            xs, ys, expression="asset1+asset2", asset_as_band=True
+        )
+        assert band_names == ["asset1+asset2"]
+
+
+def test_readers_gdal_config():
+    """Should forward the calling thread GDAL configuration to the reading threads."""
+    configs = []
+    post_init = Reader.__attrs_post_init__
+    preview = Reader.preview
+
+    def _post_init(self):
+        configs.append((threading.get_ident(), get_gdal_config("CPL_FOO")))
+        return post_init(self)
+
+    def _preview(self, *args, **kwargs):
+        configs.append((threading.get_ident(), get_gdal_config("CPL_FOO")))
+        return preview(self, *args, **kwargs)
+
+    def _read():
+        # Outside the main thread (e.g in the executor), GDAL config is thread local
+        with rasterio.Env(CPL_FOO="bar"):
+            with MultiFilesBandsReader(cogb1b2b3_path, threads=3) as src_dst:
+                configs.clear()
+                src_dst.preview(bands=src_dst.bands, max_size=64)
+                src_dst.info(bands=src_dst.bands)
+                src_dst.points([-2.0], [48.0], bands=src_dst.bands)
+
+            with MultiFilesAssetsReader(cogb1b2b3_path, threads=3) as src_dst:
+                src_dst.preview(assets=src_dst.assets, max_size=64)
+                src_dst.point(-2.0, 48.0, assets=src_dst.assets)
+                src_dst.points([-2.0], [48.0], assets=src_dst.assets)
+                src_dst.timeseries([-2.0], [48.0])
+
+        return threading.get_ident()
+
+    with (
+        patch.object(Reader, "__attrs_post_init__", _post_init),
+        patch.object(Reader, "preview", _preview),
+        ThreadPoolExecutor(max_workers=1) as executor,
+    ):
+        caller = executor.submit(_read).result()
+
+    assert {ident for ident, _ in configs} - {caller}
+    assert {config for _, config in configs} == {"bar"}
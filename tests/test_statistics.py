@@ -0,0 +1,104 @@
+"""tests rio_viz.io.statistics."""
+
+import numpy
+import pytest
+from rio_tiler.utils import get_array_statistics
+
+from rio_viz.io import statistics
+
+
+def test_merge_statistics():
+    """Should match statistics of the stacked arrays."""
+    rng = numpy.random.default_rng(0)
+    data = numpy.ma.MaskedArray(
+        rng.integers(0, 1000, (2, 100, 100)),
+        mask=rng.random((2, 100, 100)) > 0.8,
+    )
+
+    summaries = None
+    for part in [data[:, :30], data[:, 30:70], data[:, 70:]]:
+        summaries = statistics.merge(summaries, statistics.summarize(part))
+
+    expected = get_array_statistics(data, percentiles=[2, 50, 98], bins=20)
+    for band, summary in enumerate(summaries):
+        stats = statistics.get_statistics(summary, percentiles=[2, 50, 98], bins=20)
+        for key in [
+            "min",
+            "max",
+            "count",
+            "sum",
+            "majority",
+            "minority",
+            "unique",
+            "valid_pixels",
+            "masked_pixels",
+            "valid_percent",
+        ]:
+            assert stats[key] == expected[band][key], key
+
+        for key in ["mean", "std"]:
+            assert stats[key] == pytest.approx(expected[band][key])
+
+        for key in ["median", "percentile_2", "percentile_50", "percentile_98"]:
+            assert stats[key] == pytest.approx(expected[band][key], abs=1)
+
+        assert stats["histogram"][0] == expected[band]["histogram"][0]
+        numpy.testing.assert_allclose(
+            stats["histogram"][1], expected[band]["histogram"][1]
+        )
+
+    # categorical
+    stats = statistics.get_statistics(
+        summaries[0], categorical=True, categories=[1, 2, 2000]
+    )
+    expected = get_array_statistics(data, categorical=True, categories=[1, 2, 2000])
+    assert stats["histogram"] == expected[0]["histogram"]
+
+
+def test_statistics_bins():
+    """Should bin values when there are too many distinct values."""
+    rng = numpy.random.default_rng(0)
+    data = numpy.ma.MaskedArray(rng.normal(0, 1, (1, 500, 500)))
+
+    summaries = None
+    for part in [data[:, :250], data[:, 250:]]:
+        summaries = statistics.merge(summaries, statistics.summarize(part))
+
+    assert len(summaries[0]["values"]) <= statistics.MAX_VALUES
+    assert summaries[0]["binned"]
+
+    stats = statistics.get_statistics(summaries[0])
+    assert numpy.isnan(stats["unique"])
+    expected = get_array_statistics(data)[0]
+    assert stats["min"] == expected["min"]
+    assert stats["max"] == expected["max"]
+    assert stats["count"] == expected["count"]
+    assert stats["std"] == pytest.approx(expected["std"])
+    assert stats["percentile_2"] == pytest.approx(expected["percentile_2"], abs=0.01)
+    assert stats["percentile_98"] == pytest.approx(expected["percentile_98"], abs=0.01)
+    assert sum(stats["histogram"][0]) == 250000
+
+
+def test_statistics_empty():
+    """Should return NaN for fully masked data."""
+    data = numpy.ma.MaskedArray(numpy.zeros((1, 10, 10)), mask=True)
+    stats = statistics.get_statistics(statistics.summarize(data)[0])
+    assert stats["count"] == 0
+    assert numpy.isnan(stats["min"])
+    assert stats["masked_pixels"] == 100
+    assert stats["valid_percent"] == 0
+
+
+def test_statistics_binned_merge():
+    """Should keep unique unknown once any merged summary was binned."""
+    rng = numpy.random.default_rng(0)
+    binned = statistics.summarize(numpy.ma.MaskedArray(rng.normal(0, 1, (1, 100, 100))))
+    assert binned[0]["binned"]
+
+    exact = statistics.summarize(numpy.ma.MaskedArray(numpy.zeros((1, 2, 2))))
+    assert not exact[0]["binned"]
+
+    summaries = statistics.merge(exact, binned)
+    assert len(summaries[0]["values"]) <= statistics.MAX_VALUES
+    assert summaries[0]["binned"]
+    assert numpy.isnan(statistics.get_statistics(summaries[0])["unique"])